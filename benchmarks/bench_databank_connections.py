@@ -0,0 +1,49 @@
+# Times entry lookups on a scratch databank: with a fresh connection per call (what every db_handler function used to do),
+# with the long-lived per-thread connection, and through getEntryContent's cache when a few entries get most of the lookups.
+import synthetic_listing # noqa: F401 (points the working directory at the repository root)
+
+from contextlib import closing
+import tempfile
+import sqlite3
+import random
+import timeit
+import os
+
+import db_handler
+
+entryCount = 500
+lookupCount = 2000
+
+def connectPerCall(entryName: str) -> str:
+    with closing(sqlite3.connect(db_handler.firmStates.dbFilePath)) as conn:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT is_deleted, text FROM entries WHERE name = ?", (entryName,))
+            return cursor.fetchone()[1]
+
+
+def main():
+    db_handler.firmStates.dbFilePath = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db_handler.initDB()
+    for entryIndex in range(entryCount):
+        db_handler.addEntry(f"Entry{entryIndex}", f"Entry {entryIndex} text. " * 40)
+
+    lookupNames = [f"Entry{index % entryCount}" for index in range(lookupCount)]
+
+    perCallTime = timeit.timeit(lambda: [connectPerCall(entryName) for entryName in lookupNames], number=1) / lookupCount
+    pooledTime = timeit.timeit(lambda: [db_handler.fetchEntryContent(entryName) for entryName in lookupNames], number=1) / lookupCount
+    print(f"Entry lookup: connection per call {perCallTime * 1e6:.0f} us, long-lived connection {pooledTime * 1e6:.0f} us")
+
+    # popular lore gets asked about over and over; a Zipf-like spread over the entries
+    rng = random.Random(0)
+    popularNames = rng.choices([f"Entry{index}" for index in range(entryCount)], weights=[1 / (rank + 1) for rank in range(entryCount)], k=lookupCount)
+
+    db_handler.entryContentCache.clear()
+    cachedTime = timeit.timeit(lambda: [db_handler.getEntryContent(entryName) for entryName in popularNames], number=1) / lookupCount
+    print(f"getEntryContent with its cache, popular entries: {cachedTime * 1e6:.1f} us per lookup, {db_handler.entryContentCache}")
+
+    # an edit has to be visible right away
+    db_handler.editEntry(popularNames[0], "Edited.")
+    assert db_handler.getEntryContent(popularNames[0]) == "Edited."
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Seeds two scratch databanks with the same synthetic entries, one addEntry/editEntry call at a time (what /databank does)
+# and with importEntries in one go, then updates half of them the same two ways.
+import synthetic_listing # noqa: F401 (points the working directory at the repository root)
+
+import tempfile
+import random
+import time
+import os
+
+import db_handler
+
+entryCount = 500
+paragraphsPerEntry = 6
+
+words = ["the", "team", "season", "race", "track", "fast", "ship", "design", "shield", "engine", "pilot", "league", "energy", "turbo"]
+
+def generateText(rng: random.Random) -> str:
+    return "\n\n".join(" ".join(rng.choice(words) for _ in range(80)) + "." for _ in range(paragraphsPerEntry))
+
+
+def timeRun(label: str, run, count: int):
+    startTime = time.perf_counter()
+    run()
+    elapsedTime = time.perf_counter() - startTime
+    print(f"{label}: {elapsedTime:.2f} s ({count / elapsedTime:.0f} entries/s)")
+
+
+def main():
+    rng = random.Random(0)
+    entries = [{"name": f"Entry{index}", "text": generateText(rng)} for index in range(entryCount)]
+    edits = [{"name": entry["name"], "text": entry["text"] + "\n\n" + generateText(rng)} for entry in entries[::2]]
+
+    db_handler.firmStates.dbFilePath = os.path.join(tempfile.mkdtemp(), "one_by_one.db")
+    db_handler.initDB()
+    timeRun("Add, one entry at a time", lambda: [db_handler.addEntry(entry["name"], entry["text"]) for entry in entries], len(entries))
+    timeRun("Edit, one entry at a time", lambda: [db_handler.editEntry(entry["name"], entry["text"]) for entry in edits], len(edits))
+
+    db_handler.firmStates.dbFilePath = os.path.join(tempfile.mkdtemp(), "bulk.db")
+    db_handler.initDB()
+    timeRun("Add, importEntries", lambda: db_handler.importEntries(entries), len(entries))
+    timeRun("Edit, importEntries", lambda: db_handler.importEntries(edits), len(edits))
+    timeRun("Re-import with nothing changed", lambda: db_handler.importEntries(entries[1::2]), len(entries) // 2)
+
+
+if __name__ == "__main__":
+    main()
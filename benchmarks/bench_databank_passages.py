@@ -0,0 +1,64 @@
+# Fills a scratch databank with long synthetic entries, then compares what a lore question costs in prompt tokens when the LLM gets
+# the whole entry (databankLookup) and when it gets the most relevant passages (databankPassages), along with indexing and query times.
+import synthetic_listing # noqa: F401 (points the working directory at the repository root)
+
+import tempfile
+import random
+import timeit
+import time
+import os
+
+import db_handler
+from llm_context import estimateTokens
+
+entryCount = 200
+paragraphsPerEntry = 12
+queryCount = 200
+
+topics = ["shield", "engine", "weapon", "hull", "pilot", "league", "circuit", "sponsor", "telemetry", "airbrake", "turbo", "energy"]
+fillerWords = ["the", "team", "season", "race", "track", "fast", "ship", "design", "tested", "during", "championship", "with", "new"]
+
+def generateParagraph(random: random.Random, entryIndex: int, topic: str) -> str:
+    words = [random.choice(fillerWords) for _ in range(70)]
+    for position in random.sample(range(len(words)), 6):
+        words[position] = topic
+    return f"Team{entryIndex} {topic} notes: " + " ".join(words) + "."
+
+
+def main():
+    rng = random.Random(0)
+    databankPath = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db_handler.firmStates.dbFilePath = databankPath
+    db_handler.initDB()
+
+    entries = {}
+    for entryIndex in range(entryCount):
+        entries[f"Team{entryIndex}"] = "\n\n".join(generateParagraph(rng, entryIndex, topic) for topic in rng.sample(topics, paragraphsPerEntry))
+
+    startTime = time.perf_counter()
+    for entryName, entryText in entries.items():
+        db_handler.addEntry(entryName, entryText)
+    indexTime = time.perf_counter() - startTime
+    print(f"Added and indexed {entryCount} entries in {indexTime:.2f} s ({entryCount / indexTime:.0f} entries/s)")
+
+    questions = [(f"Team{rng.randrange(entryCount)}", rng.choice(topics)) for _ in range(queryCount)]
+    db_handler.searchPassages("warm-up") # loads the passages into memory
+
+    queryTime = timeit.timeit(lambda: [db_handler.searchPassages(f"What about the {topic} of {entryName}?") for entryName, topic in questions], number=1) / queryCount
+    print(f"Passage search over {len(db_handler.passageCache[1])} passages: {queryTime * 1e3:.2f} ms per question")
+
+    wholeEntryTokens = 0
+    passageTokens = 0
+    relevantHits = 0
+    for entryName, topic in questions:
+        wholeEntryTokens += estimateTokens({"content": db_handler.getEntryContent(entryName)})
+        results = db_handler.searchPassages(f"What about the {topic} of {entryName}?")
+        passageTokens += sum(estimateTokens({"content": result["passage"]}) for result in results)
+        relevantHits += any(result["name"] == entryName and f"{topic} notes" in result["passage"] for result in results)
+
+    print(f"Tokens per question: whole entry ~{wholeEntryTokens // queryCount}, top 3 passages ~{passageTokens // queryCount}")
+    print(f"Questions with the right passage in the top 3: {relevantHits}/{queryCount}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Edits a long synthetic entry many times on a scratch databank, then compares what its history costs to store as unified diffs (what `edits` used to hold)
+# and as snapshots plus deltas (`entry_versions`), and how long rebuilding an old version takes.
+import synthetic_listing # noqa: F401 (points the working directory at the repository root)
+
+from difflib import unified_diff
+from contextlib import closing
+import tempfile
+import random
+import timeit
+import time
+import os
+
+import db_handler
+from io_handler import ioScopes
+from io_handler import ioRead
+
+lineCount = 150
+editCount = 1000
+fetchCount = 500
+
+words = ["the", "team", "season", "race", "track", "fast", "ship", "design", "shield", "engine", "pilot", "league", "energy", "turbo"]
+
+def generateLine(rng: random.Random) -> str:
+    return " ".join(rng.choice(words) for _ in range(rng.randrange(6, 16))) + "."
+
+
+def main():
+    rng = random.Random(0)
+    db_handler.firmStates.dbFilePath = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db_handler.initDB()
+
+    lines = [generateLine(rng) for _ in range(lineCount)]
+    texts = ["\n".join(lines)]
+    db_handler.addEntry("Entry", texts[0])
+
+    diffBytes = 0
+    startTime = time.perf_counter()
+    for _ in range(editCount):
+        for _ in range(rng.randrange(1, 4)): # a typo fix or a rewritten sentence or two, like most edits
+            lines[rng.randrange(len(lines))] = generateLine(rng)
+        if rng.random() < 0.2:
+            lines.insert(rng.randrange(len(lines)), generateLine(rng))
+        texts.append("\n".join(lines))
+        diffBytes += len("\n".join(unified_diff(texts[-2].splitlines(), texts[-1].splitlines(), lineterm='')).encode())
+        db_handler.editEntry("Entry", texts[-1], "1")
+    editTime = time.perf_counter() - startTime
+
+    with closing(db_handler.getConnection().cursor()) as cursor:
+        cursor.execute("SELECT SUM(LENGTH(data)), SUM(is_snapshot) FROM entry_versions;")
+        versionBytes, snapshotCount = cursor.fetchone()
+
+    fullCopyBytes = sum(len(text.encode()) for text in texts)
+    print(f"{editCount} edits to a {len(texts[-1].encode()) // 1024} KiB entry ({editCount / editTime:.0f} edits/s), snapshot every {ioRead(ioScopes.config, 'dbSnapshotInterval')} versions")
+    print(f"History size: full copies {fullCopyBytes // 1024} KiB, unified diffs {diffBytes // 1024} KiB, "
+          f"snapshots + deltas {versionBytes // 1024} KiB ({snapshotCount} snapshots)")
+
+    versions = [rng.randrange(len(texts)) for _ in range(fetchCount)]
+    assert all(db_handler.getEntryVersion("Entry", version) == texts[version] for version in versions)
+    fetchTime = timeit.timeit(lambda: [db_handler.getEntryVersion("Entry", version) for version in versions], number=1) / fetchCount
+    print(f"Rebuilding a random version: {fetchTime * 1e3:.2f} ms")
+
+    # the export needs both sides of every edit, which the page rebuilds incrementally
+    exportTime = timeit.timeit(lambda: sum(1 for _ in db_handler.getEdits("Entry")), number=1)
+    print(f"Exporting every edit with its diff: {exportTime:.2f} s ({editCount / exportTime:.0f} edits/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Compares the old parse approach (full ElementTree, several findall walks per lobby) with the streaming iterLobbyRecords.
+# Only the parsing is measured; both sides extract the same data without composing lobby blocks.
+from synthetic_listing import generateListing
+
+import xml.etree.ElementTree as ET
+import tracemalloc
+import timeit
+
+from xml_parser import iterLobbyRecords
+
+lobbyCounts = [10, 100, 1000]
+repeatCount = 20
+
+def parseWithTree(xmlContent: bytes) -> int:
+    root = ET.fromstring(xmlContent)
+    parsedCount = 0
+
+    for lobby in root.findall("Lobby"):
+        attributes = dict(lobby.attrib)
+        stats, secondaryConfig, weapons, trackList = {}, [], [], []
+
+        for gameStats in lobby.findall("GameStats"):
+            for config in gameStats:
+                stats[config.tag] = config.text
+            for miscStats in gameStats.findall("LobbyConfigSecondary"):
+                secondaryConfig.extend((miscConfig.tag, miscConfig.text) for miscConfig in miscStats)
+            for weaponsPrimary in gameStats.findall("WeaponsConfigPrimary"):
+                weapons.extend(weapon.text for weapon in weaponsPrimary)
+            for weaponsSecondary in gameStats.findall("WeaponsConfigSecondary"):
+                weapons.extend(weapon.text for weapon in weaponsSecondary)
+            for tracks in gameStats.findall("TrackList"):
+                trackList.extend(track.text for track in tracks)
+
+        parsedCount += 1
+
+    return parsedCount
+
+
+def parseWithStream(xmlContent: bytes) -> int:
+    parsedCount = 0
+    for lobby in iterLobbyRecords(xmlContent):
+        parsedCount += 1
+    return parsedCount
+
+
+def peakMemory(function, xmlContent: bytes) -> int:
+    tracemalloc.start()
+    function(xmlContent)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    print(f"{'lobbies':>8} {'tree (ms)':>10} {'stream (ms)':>12} {'tree peak (KiB)':>16} {'stream peak (KiB)':>18}")
+    for lobbyCount in lobbyCounts:
+        xmlContent = generateListing(lobbyCount)
+        assert parseWithTree(xmlContent) == parseWithStream(xmlContent) == lobbyCount
+
+        treeTime = timeit.timeit(lambda: parseWithTree(xmlContent), number=repeatCount) / repeatCount
+        streamTime = timeit.timeit(lambda: parseWithStream(xmlContent), number=repeatCount) / repeatCount
+
+        print(f"{lobbyCount:>8} {treeTime * 1e3:>10.2f} {streamTime * 1e3:>12.2f} \
+{peakMemory(parseWithTree, xmlContent) / 1024:>16.1f} {peakMemory(parseWithStream, xmlContent) / 1024:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Renders a tournament-heavy listing with the dict-backed lookup tables, and again with lookups that compare IDs one by one
+# (which is what the old match statements did), to show how much of a render the lookups used to take.
+from synthetic_listing import generateListing
+
+import asyncio
+import timeit
+
+import lookup_tables
+import xml_parser
+
+lobbyCount = 100
+repeatCount = 50
+
+def linearLookup(table: dict, fallback):
+    entries = list(table.items())
+    def lookup(key):
+        for candidate, value in entries:
+            if candidate == key:
+                return value
+        return fallback
+    return lookup
+
+linearConverters = {
+    "convertGameLevelToName": linearLookup(lookup_tables.gameLevelNames, "???"),
+    "convertPulseGameLevelToName": linearLookup(lookup_tables.pulseGameLevelNames, "???"),
+    "convertRulesetToMode": linearLookup(lookup_tables.rulesetModes, None),
+    "convertPulseRulesetToMode": linearLookup(lookup_tables.pulseRulesetModes, "???"),
+    "convertPlayerSkillToClass": linearLookup(lookup_tables.playerSkillClasses, None),
+    "weaponIndexesToList": linearLookup(lookup_tables.weaponIndexes, None),
+    "eliminatorWeaponIndexesToList": linearLookup(lookup_tables.eliminatorWeaponIndexes, None),
+}
+
+def renderListing(xmlContent: bytes) -> str:
+    xml_parser.volatileStates.hashAPILobby = "None"
+    xml_parser.volatileStates.lobbyBlockCache = {} # every lobby has to be rendered for the lookups to be measured
+    xml_parser.volatileStates.tourneyProgressByLobby = {}
+
+    async def fakeFetch(url, conditional=False):
+        return "ok", xmlContent
+    xml_parser.fetchEndpoint = fakeFetch
+
+    return asyncio.run(xml_parser.fetchLobbyList())
+
+
+def main():
+    xmlContent = generateListing(lobbyCount, tourneyShare=0.8)
+    dictConverters = {name: getattr(xml_parser, name) for name in linearConverters}
+
+    dictListing = renderListing(xmlContent)
+    dictTime = timeit.timeit(lambda: renderListing(xmlContent), number=repeatCount) / repeatCount
+
+    for name, converter in linearConverters.items():
+        setattr(xml_parser, name, converter)
+    linearListing = renderListing(xmlContent)
+    linearTime = timeit.timeit(lambda: renderListing(xmlContent), number=repeatCount) / repeatCount
+
+    for name, converter in dictConverters.items():
+        setattr(xml_parser, name, converter)
+
+    assert dictListing == linearListing
+    print(f"Full render of {lobbyCount} lobbies (80% tournaments): linear lookups {linearTime * 1e3:.2f} ms, dict lookups {dictTime * 1e3:.2f} ms")
+
+    trackIDs = list(lookup_tables.gameLevelNames) + ["unknown"]
+    linearTrackLookup = linearConverters["convertGameLevelToName"]
+    linearPerLookup = timeit.timeit(lambda: [linearTrackLookup(trackID) for trackID in trackIDs], number=2000) / (2000 * len(trackIDs))
+    dictPerLookup = timeit.timeit(lambda: [lookup_tables.convertGameLevelToName(trackID) for trackID in trackIDs], number=2000) / (2000 * len(trackIDs))
+    print(f"HD track lookup, averaged over every ID: linear {linearPerLookup * 1e9:.0f} ns, dict {dictPerLookup * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
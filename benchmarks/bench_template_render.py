@@ -0,0 +1,49 @@
+# Compares rendering status_online.md the old way (read the file, then three chained str.replace passes)
+# with the compiled, cached template from template_handler.
+from synthetic_listing import generateListing
+
+import asyncio
+import timeit
+
+from io_handler import ioScopes
+from io_handler import ioRead
+
+from template_handler import renderTemplate
+
+import xml_parser
+
+repeatCount = 2000
+
+def renderWithReplaceChain(playerCount: str, lobbyListing: str) -> str:
+    return ioRead(ioScopes.md, "status_online.md")\
+    .replace("!PLAYERCOUNT", playerCount)\
+    .replace("!LOBBYLISTING", lobbyListing)\
+    .replace("!NOPLAYERS\n", "")
+
+
+def renderWithTemplate(playerCount: str, lobbyListing: str) -> str:
+    return renderTemplate("status_online.md", {
+        "!PLAYERCOUNT": None if playerCount == "!NOPLAYERS" else playerCount,
+        "!LOBBYLISTING": lobbyListing
+    })
+
+
+def main():
+    print(f"{'lobbies':>8} {'players':>11} {'replace chain (us)':>19} {'template (us)':>14}")
+    for lobbyCount in [0, 10, 100]:
+        async def fakeFetch(url, conditional=False):
+            return "ok", generateListing(lobbyCount)
+        xml_parser.fetchEndpoint = fakeFetch
+        lobbyListing = asyncio.run(xml_parser.fetchLobbyList())
+
+        for playerCount in ["!NOPLAYERS", "12 players are currently logged in."]:
+            assert renderWithReplaceChain(playerCount, lobbyListing) == renderWithTemplate(playerCount, lobbyListing)
+
+            replaceChain = timeit.timeit(lambda: renderWithReplaceChain(playerCount, lobbyListing), number=repeatCount) / repeatCount
+            template = timeit.timeit(lambda: renderWithTemplate(playerCount, lobbyListing), number=repeatCount) / repeatCount
+
+            print(f"{lobbyCount:>8} {'none' if playerCount == '!NOPLAYERS' else 'some':>11} {replaceChain * 1e6:>19.1f} {template * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Measures what an unchanged lobby listing costs per poll.
+# "before" reproduces the old order of work (SHA-1, full parse, then the hash comparison),
+# "after" runs the current fetchLobbyList against a payload it has already seen.
+from synthetic_listing import generateListing
+
+import xml.etree.ElementTree as ET
+import asyncio
+import hashlib
+import timeit
+
+import xml_parser
+
+lobbyCounts = [10, 100, 1000]
+repeatCount = 200
+
+def unchangedPollBefore(xmlContent: bytes, storedHash: str) -> str:
+    xmlHash = hashlib.sha1(xmlContent).hexdigest()
+    root = ET.fromstring(xmlContent)
+    if xmlHash == storedHash:
+        return "nothingToDo"
+    return root.tag
+
+
+def main():
+    eventLoop = asyncio.new_event_loop()
+
+    print(f"{'lobbies':>8} {'bytes':>9} {'before (us)':>12} {'after (us)':>11} {'speedup':>8}")
+    for lobbyCount in lobbyCounts:
+        xmlContent = generateListing(lobbyCount)
+
+        async def fakeFetch(url, conditional=False):
+            return "ok", xmlContent
+        xml_parser.fetchEndpoint = fakeFetch
+
+        storedHash = hashlib.sha1(xmlContent).hexdigest()
+        before = timeit.timeit(lambda: unchangedPollBefore(xmlContent, storedHash), number=repeatCount) / repeatCount
+
+        eventLoop.run_until_complete(xml_parser.fetchLobbyList()) # first poll renders and stores the hash
+        after = timeit.timeit(lambda: eventLoop.run_until_complete(xml_parser.fetchLobbyList()), number=repeatCount) / repeatCount
+
+        print(f"{lobbyCount:>8} {len(xmlContent):>9} {before * 1e6:>12.1f} {after * 1e6:>11.1f} {before / after:>7.1f}x")
+
+    eventLoop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Synthetic API payloads for the benchmarks in this directory.
+# Importing this module also points the working directory and import path at the repository root, since the bot's modules
+# read `./external` on import. Run the benchmarks from a configured checkout (see README.md -> Configuration).
+from pathlib import Path
+import random
+import sys
+import os
+
+repositoryRoot = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repositoryRoot))
+os.chdir(repositoryRoot)
+
+hdTrackIDs = ["1493080313", "-848896726", "-815691312", "180795230", "1763082852", "-1655069065", "-1397637910", "992914883",
+              "1796331166", "1374922473", "-142299811", "-1480862208", "450600836", "-1924886867", "-292242537", "-1891378601"]
+pulseTrackIDs = ["1374922473", "-409369209", "-815691312", "-1480862208", "30203316", "1763082852", "841192403", "-545480438",
+                 "450600836", "-1397637910", "180795230", "-1129540560", "1879479470", "-965953600", "1612430452", "-697196774"]
+playerSuffixes = ["+PS3", "+Vita", " (RPCS3)", "+PS3 (PPSSPP)", ""]
+regions = ["us", "gb", "de", "fr", "jp", "au"]
+
+def playerList(lobbyIndex: int, count: int, pulse: bool) -> str:
+    if pulse:
+        return ", ".join(f"Pilot{lobbyIndex}_{i}" + (" (PPSSPP)" if i % 3 == 0 else "") for i in range(count))
+    return ", ".join(f"Pilot{lobbyIndex}_{i} ({regions[i % len(regions)]}){playerSuffixes[i % len(playerSuffixes)]}" for i in range(count))
+
+
+def hdLobby(index: int, ruleSet: str, rng: random.Random) -> str:
+    trackCount = rng.choice([4, 6, 8]) if ruleSet == "17" else 0
+    trackList = "".join(f"<TrackID>{rng.choice(hdTrackIDs)}</TrackID>" for _ in range(trackCount))
+    weapons = [rng.choice("0111") for _ in range(11)]
+    playerCount = rng.randint(1, 8)
+
+    return f"""<Lobby AppId="23360" GameName="Lobby {index}" GameLevel="{rng.choice(hdTrackIDs)}" RuleSet="{ruleSet}" \
+PlayerSkillLevel="{rng.randint(0, 3)}" PlayerListCurrent="{playerList(index, playerCount, False)}" GenericField1="{rng.choice('01')}" \
+PlayerCount="{playerCount}" MaxPlayers="8" GameCreateDt="2025-03-0{rng.randint(1, 9)}T12:{rng.randint(10, 59)}:00Z">
+<GameStats><HostName>Host {index}</HostName><LapCount>{rng.randint(3, 5)}</LapCount><ElimTarget>10</ElimTarget><ZBTarget>30</ZBTarget>\
+<RaceProgress>{rng.randint(0, 6)}</RaceProgress>\
+<LobbyConfigSecondary><WeaponHints>{rng.choice('01')}</WeaponHints><BRsAllowed>{rng.choice('01')}</BRsAllowed>\
+<PilotAssistAllowed>{rng.choice('01')}</PilotAssistAllowed></LobbyConfigSecondary>\
+<WeaponsConfigPrimary>{"".join(f"<Weapon>{w}</Weapon>" for w in weapons[:6])}</WeaponsConfigPrimary>\
+<WeaponsConfigSecondary>{"".join(f"<Weapon>{w}</Weapon>" for w in weapons[6:])}</WeaponsConfigSecondary>\
+<TrackList totalEntries="{trackCount}">{trackList}</TrackList></GameStats>
+</Lobby>"""
+
+
+def pulseLobby(index: int, ruleSet: str, rng: random.Random) -> str:
+    trackList = "".join(f"<Bitmask>{rng.choice(pulseTrackIDs)}</Bitmask>" for _ in range(8 if ruleSet == "16" else 0))
+    playerCount = rng.randint(1, 8)
+
+    return f"""<Lobby AppId="20794" GameName="Pulse Lobby {index}" GameLevel="{rng.choice(pulseTrackIDs)}" RuleSet="{ruleSet}" \
+PlayerSkillLevel="{rng.randint(0, 3)}" PlayerListCurrent="{playerList(index, playerCount, True)}" PlayerCount="{playerCount}" MaxPlayers="8">
+<GameStats><Weapons>{rng.choice('01')}</Weapons><TrackList>{trackList}</TrackList><RaceInProgress>{rng.choice('01')}</RaceInProgress></GameStats>
+</Lobby>"""
+
+
+def generateListing(lobbyCount: int, tourneyShare: float = 0.25, seed: int = 0) -> bytes:
+    """
+    Build a GetLobbyListing-shaped payload with a mix of HD and Pulse lobbies.
+
+    Args:
+        lobbyCount (int): How many lobbies the listing should have.
+        tourneyShare (float): Roughly which share of the lobbies are tournaments (0 to 1).
+        seed (int): The seed of the generator, so that runs are comparable.
+
+    Returns:
+        bytes: The listing, as it would be received from the API.
+    """
+    rng = random.Random(seed)
+    lobbies = []
+
+    for index in range(lobbyCount):
+        isTourney = rng.random() < tourneyShare
+        if index % 3 == 2:
+            lobbies.append(pulseLobby(index, "16" if isTourney else rng.choice(["14", "15", "18"]), rng))
+        else:
+            lobbies.append(hdLobby(index, "17" if isTourney else rng.choice(["16", "20", "21"]), rng))
+
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<Lobbies totalEntries="{lobbyCount}">{"".join(lobbies)}</Lobbies>""".encode()
+
+
+def generatePlayerCount(playerCount: int) -> bytes:
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<Players totalEntries="{playerCount}" />""".encode()
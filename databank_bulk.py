@@ -0,0 +1,91 @@
+# Bulk import and export for the databank, for seeding or migrating lore without going through /databank one entry at a time.
+# Run from the repository root (like holocorp.py), preferably while the bot is stopped, since the bot only notices changes it made itself:
+#   $ python ./databank_bulk.py import <file.jsonl or directory of .md files>
+#   $ python ./databank_bulk.py export <file.jsonl or directory>
+from db_handler import importEntries
+from db_handler import getEntries
+
+from urllib.parse import unquote
+from urllib.parse import quote
+from pathlib import Path
+import argparse
+import logging
+import json
+import time
+
+def readEntries(path: Path) -> list:
+    """
+    Read entries from a JSONL file (one `{"name": ..., "text": ...}` object per line) or a directory of Markdown files (one entry per file, named after the file).
+
+    Args:
+        path (Path): The file or directory.
+
+    Returns:
+        list: A list of dictionaries that contain the entries' names and contents.
+
+    Raises:
+        ValueError: if a JSONL line isn't an object with a name and a text.
+    """
+    if path.is_dir():
+        return [{"name": unquote(file.stem), "text": file.read_text(encoding="utf-8")} for file in sorted(path.glob("*.md"))]
+
+    entries = []
+    with open(path, "r", encoding="utf-8") as file:
+        for lineNumber, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if not isinstance(entry, dict) or not isinstance(entry.get("name"), str) or not isinstance(entry.get("text"), str):
+                raise ValueError(f"[readEntries] Line {lineNumber} of {path} needs a `name` and a `text` string.")
+            entries.append({"name": entry["name"], "text": entry["text"]})
+    return entries
+
+
+def writeEntries(path: Path, entries: list):
+    """
+    Write entries to a JSONL file, or to a directory of Markdown files if `path` doesn't end in `.jsonl`.
+    Characters that can't go in a file name are percent-encoded, which `readEntries` undoes.
+
+    Args:
+        path (Path): The file or directory.
+        entries (list): A list of dictionaries that contain the entries' names and contents.
+
+    Returns:
+        None.
+    """
+    if path.suffix == ".jsonl":
+        with open(path, "w", encoding="utf-8") as file:
+            for entry in entries:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return
+
+    path.mkdir(parents=True, exist_ok=True)
+    for entry in entries:
+        (path / f"{quote(entry['name'], safe=' ')}.md").write_text(entry["text"], encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import entries into the databank or export them from it.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", type=Path, help="a .jsonl file or a directory of .md files")
+    parser.add_argument("--editor", default="0", help="the editor ID imported edits are logged under (default: 0, anonymous)")
+    parser.add_argument("--workers", type=int, default=None, help="processes used to work out deltas and vectors (default: one per CPU)")
+    args = parser.parse_args()
+    logging.basicConfig(encoding="utf-8", level=logging.INFO)
+
+    startTime = time.perf_counter()
+    if args.action == "import":
+        entries = readEntries(args.path)
+        counts = importEntries(entries, args.editor, args.workers)
+        summary = f"{counts['added']} added, {counts['edited']} edited, {counts['unchanged']} unchanged"
+    else:
+        entries = getEntries()
+        writeEntries(args.path, entries)
+        summary = f"written to {args.path}"
+
+    elapsedTime = time.perf_counter() - startTime
+    print(f"{args.action.capitalize()}ed {len(entries)} entries in {elapsedTime:.2f} s ({len(entries) / max(elapsedTime, 1e-9):.0f} entries/s): {summary}")
+
+
+if __name__ == "__main__":
+    main()
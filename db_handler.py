@@ -2,21 +2,322 @@ from difflib import unified_diff
 
 from states import firmStateSet
 
+from text_vectors import vectorizeChunks
+from text_vectors import vectorizeText
+from text_vectors import topChunks
+
+from text_deltas import revertUnifiedDiff
+from text_deltas import unpackSnapshot
+from text_deltas import packSnapshot
+from text_deltas import applyDelta
+from text_deltas import makeDelta
+
 from io_handler import ioScopes
 from io_handler import ioRead
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from contextlib import closing
+from collections import OrderedDict
+from array import array
 from enum import Enum
+import functools
+import threading
 import sqlite3
+import asyncio
 import logging
 import time
 import os
+import re
 
 # TODO add rename function command
 
+# every thread that touches the databank keeps one connection open for good, instead of connecting (and parsing the schema) per call
+connectionStore = threading.local()
+
+# databank calls from async code go through here (see runDB), so they never block the event loop;
+# a couple of threads is plenty, since SQLite only ever runs one write at a time anyway
+dbExecutor = ThreadPoolExecutor(max_workers=int(ioRead(ioScopes.config, "dbWorkerThreads")), thread_name_prefix="databank")
+
+def getConnection() -> sqlite3.Connection:
+    """
+    Return the calling thread's databank connection, opening and tuning it on first use (or if `dbFilePath` has changed since).
+
+    Args:
+        None.
+
+    Returns:
+        sqlite3.Connection: The thread's connection.
+    """
+    conn = getattr(connectionStore, "conn", None)
+    if conn is not None and connectionStore.path == firmStates.dbFilePath:
+        return conn
+
+    if conn is not None:
+        conn.close()
+
+    conn = sqlite3.connect(firmStates.dbFilePath, cached_statements=256) # prepared statements are reused across calls
+    conn.execute("PRAGMA journal_mode = WAL;")     # readers don't wait for writers
+    conn.execute("PRAGMA synchronous = NORMAL;")   # safe with WAL, and no fsync per commit
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA busy_timeout = 5000;")    # wait for the other thread's write instead of failing
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA cache_size = -8192;")     # 8 MiB of page cache
+
+    connectionStore.conn = conn
+    connectionStore.path = firmStates.dbFilePath
+    logging.debug(f"[getConnection] Opened a connection for thread `{threading.current_thread().name}`")
+    return conn
+
+
+@contextmanager
+def databankConnection():
+    """
+    Lend out the calling thread's connection for a `with` block. It stays open afterwards;
+    an exception rolls back whatever the block didn't commit, so the next caller starts clean.
+
+    Yields:
+        sqlite3.Connection: The thread's connection.
+    """
+    conn = getConnection()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+
+
+async def runDB(function, *args, **kwargs):
+    """
+    Run a databank function on `dbExecutor` and wait for it without blocking the event loop.
+
+    Args:
+        function (callable): The function to run, e.g. `getEntryContent`.
+        *args, **kwargs: Passed to `function`.
+
+    Returns:
+        Whatever `function` returns.
+
+    Raises:
+        Whatever `function` raises.
+    """
+    return await asyncio.get_running_loop().run_in_executor(dbExecutor, functools.partial(function, *args, **kwargs))
+
+
+# bumped on every change, so anything derived from an entry (e.g. cached LLM replies) can tell whether it's stale;
+# these only live in memory, which is fine since the bot is the only thing writing to the databank
+entryRevisions = {}
+databankRevision = 0
+revisionLock = threading.Lock() # bumped from both databank threads; a lost increment would let a cached old text pass as current
+
+def bumpEntryRevision(entryName: str):
+    """
+    Mark an entry (and with it the databank as a whole) as changed.
+
+    Args:
+        entryName (str): The name of the entry.
+
+    Returns:
+        None.
+    """
+    global databankRevision
+
+    with revisionLock:
+        entryRevisions[entryName] = entryRevisions.get(entryName, 0) + 1
+        databankRevision += 1
+    entryContentCache.invalidate(entryName)
+
+
+def getEntryRevision(entryName: str = None) -> int:
+    """
+    Get how many times an entry has changed since startup.
+
+    Args:
+        entryName (str): The name of the entry. If not passed, the revision of the databank as a whole is returned.
+
+    Returns:
+        int: The revision; it only ever goes up.
+    """
+    if entryName is None:
+        return databankRevision
+    return entryRevisions.get(entryName, 0)
+
+
+class entryContentLRU():
+    def __init__(self, maxBytes: int):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict() # (entry name, revision) -> (contents, size in bytes), least recently used first
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock() # shared by the databank threads
+
+    def get(self, key):
+        """
+        Return cached contents and mark them as recently used.
+
+        Args:
+            key (tuple): (entry name, revision).
+
+        Returns:
+            str: The contents, or None on a miss.
+        """
+        with self.lock:
+            cachedEntry = self.entries.get(key)
+            if cachedEntry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return cachedEntry[0]
+
+    def put(self, key, contents: str):
+        """
+        Store contents, evicting the least recently used ones until everything fits in `maxBytes`. Contents bigger than that aren't stored.
+
+        Args:
+            key (tuple): (entry name, revision).
+            contents (str): The entry's contents (or status code).
+
+        Returns:
+            None.
+        """
+        size = len(contents.encode())
+        if size > self.maxBytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (contents, size)
+            self.size += size
+
+            while self.size > self.maxBytes:
+                self.size -= self.entries.popitem(last=False)[1][1]
+
+    def invalidate(self, entryName: str):
+        """
+        Drop everything cached for an entry. Stale revisions would never be hit anyway, this just frees their bytes right away.
+
+        Args:
+            entryName (str): The name of the entry.
+
+        Returns:
+            None.
+        """
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == entryName]:
+                self.size -= self.entries.pop(key)[1]
+
+    def clear(self):
+        """
+        Drop everything, e.g. after the databank was changed from outside the bot.
+
+        Args, Returns, Raises:
+            None.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def __repr__(self):
+        return f"entryContentLRU({len(self.entries)} entries, {self.size}/{self.maxBytes} bytes, {self.hits} hits, {self.misses} misses)"
+
+
+# the LLM keeps asking about the same handful of entries, so their contents are kept in memory, keyed on the entry's revision
+entryContentCache = entryContentLRU(int(ioRead(ioScopes.config, "dbEntryCacheBytes")))
+
+# names of the entries that aren't deleted, in the order they were added; loaded on first use (see getEntryNames) and then
+# kept up to date by the functions that add, remove or restore entries, so listing them never has to read the entries' text
+entryNames = None # dict used as an ordered set
+entryNamesVersion = 0
+entryNamesLock = threading.Lock() # the databank threads update it while the event loop reads it
+
+def getEntryNames() -> list:
+    """
+    Get the names of all entries that aren't marked as removed, loading them from the databank the first time.
+
+    Args:
+        None.
+
+    Returns:
+        list: The names, in the order the entries were added.
+    """
+    global entryNames
+
+    while True:
+        with entryNamesLock:
+            if entryNames is not None:
+                return list(entryNames)
+            loadVersion = entryNamesVersion
+
+        # read outside the lock so the event loop never waits on SQLite; if a name changed meanwhile, the result may miss it, so read again
+        with databankConnection() as conn:
+            loadedNames = dict.fromkeys(name for name, in conn.execute("SELECT name FROM entries WHERE is_deleted = FALSE ORDER BY id;"))
+
+        with entryNamesLock:
+            if entryNamesVersion == loadVersion:
+                if entryNames is None:
+                    entryNames = loadedNames
+                    logging.debug(f"[getEntryNames] Loaded {len(entryNames)} entry names")
+                return list(entryNames)
+
+
+def getEntryNamesVersion() -> int:
+    """
+    Get the version of the entry name list, which goes up whenever a name is added or removed, so whatever is built from the list
+    (like the LLM's tool schema) knows when to rebuild.
+
+    Args:
+        None.
+
+    Returns:
+        int: The version.
+    """
+    return entryNamesVersion
+
+
+def updateEntryNames(entryName: str, visible: bool):
+    """
+    Add a name to the entry name list or take one out of it.
+
+    Args:
+        entryName (str): The name of the entry.
+        visible (bool): Whether the entry is now listed.
+
+    Returns:
+        None.
+    """
+    global entryNamesVersion
+
+    with entryNamesLock:
+        if entryNames is not None:
+            if visible:
+                entryNames[entryName] = None
+            else:
+                entryNames.pop(entryName, None)
+        entryNamesVersion += 1
+
+
+def reloadEntryNames():
+    """
+    Forget the entry name list, so it's read from the databank again the next time it's needed. Only needed if something other than the bot changed the databank.
+
+    Args, Returns, Raises:
+        None.
+    """
+    global entryNames, entryNamesVersion
+
+    with entryNamesLock:
+        entryNames = None
+        entryNamesVersion += 1
+
+
 def initDB():
     """
     Initialize the database at `dbFilePath` from `dbSchemaPath`.
+    The schema only creates what's missing, so this also brings databases made with an older schema up to date.
 
     Args, Returns, Raises:
         None.
@@ -30,13 +331,227 @@ def initDB():
     else:
         logging.debug(f"[initDB] Unable to fetch the scheme.")
 
-    conn = sqlite3.connect(firmStates.dbFilePath)
+    conn = getConnection()
+    searchIndexExisted = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries_fts';").fetchone() is not None
     conn.executescript(schema)
+
+    if not searchIndexExisted: # the triggers only cover changes made from now on
+        conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild');")
+        logging.info("[initDB] Search index built from existing entries")
+
+    with closing(conn.cursor()) as cursor:
+        cursor.execute("SELECT id, text FROM entries WHERE id NOT IN (SELECT entry_id FROM entry_chunks);")
+        unindexedEntries = cursor.fetchall()
+        for entryID, entryText in unindexedEntries:
+            indexEntryChunks(cursor, entryID, entryText)
+    if unindexedEntries:
+        logging.info(f"[initDB] Split {len(unindexedEntries)} entries into passages")
+
+    with closing(conn.cursor()) as cursor:
+        migrateEntryHistory(cursor)
+
     conn.commit()
-    conn.close()
     logging.info("[initDB] Database initialized")
 
 
+def indexEntryChunks(cursor: sqlite3.Cursor, entryID: int, entryText: str, chunks: list = None):
+    """
+    Split an entry into passages and (re)place them, along with their vectors, in `entry_chunks`. Committing is up to the caller.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor to write with.
+        entryID (int): The entry's ID.
+        entryText (str): The entry's current contents.
+        chunks (list): Optional; the output of `vectorizeChunks(entryText)`, if it was already worked out elsewhere.
+
+    Returns:
+        None.
+    """
+    if chunks is None:
+        chunks = vectorizeChunks(entryText)
+
+    cursor.execute("DELETE FROM entry_chunks WHERE entry_id = ?;", (entryID,))
+    cursor.executemany(
+        "INSERT INTO entry_chunks (entry_id, chunk_index, text, vector) VALUES (?, ?, ?, ?);",
+        [(entryID, chunkIndex, chunk, vector) for chunkIndex, (chunk, vector) in enumerate(chunks)]
+    )
+
+
+def getSnapshotInterval() -> int:
+    """
+    Get `dbSnapshotInterval` from the config, which has to be at least 1 (a snapshot for every version).
+
+    Args:
+        None.
+
+    Returns:
+        int: How many versions apart full snapshots are stored.
+    """
+    snapshotInterval = int(ioRead(ioScopes.config, "dbSnapshotInterval"))
+    if snapshotInterval < 1:
+        logging.warning(f"[getSnapshotInterval] dbSnapshotInterval is {snapshotInterval}, storing every version whole instead")
+        return 1
+    return snapshotInterval
+
+
+def saveEntryVersion(cursor: sqlite3.Cursor, entryID: int, entryText: str, editorID, timestamp: int, previousText: str = None):
+    """
+    Append a version to an entry's history in `entry_versions`. Committing is up to the caller.
+    The first version, and every `dbSnapshotInterval`th after it, is stored whole; the rest are stored as a delta against the version before.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor to write with.
+        entryID (int): The entry's ID.
+        entryText (str): The entry's new contents.
+        editorID: The ID of the editor.
+        timestamp (int): The UNIX timestamp of the change, or None if it's unknown.
+        previousText (str): The entry's contents before the change, if the caller has them at hand; they're rebuilt otherwise.
+
+    Returns:
+        int: The new version's number.
+    """
+    cursor.execute("SELECT MAX(version) FROM entry_versions WHERE entry_id = ?;", (entryID,))
+    lastVersion = cursor.fetchone()[0]
+    version = 0 if lastVersion is None else lastVersion + 1
+
+    if version % getSnapshotInterval() == 0:
+        isSnapshot, data = True, packSnapshot(entryText)
+    else:
+        if previousText is None:
+            previousText = rebuildEntryVersion(cursor, entryID, lastVersion)
+        isSnapshot, data = False, makeDelta(previousText, entryText)
+
+    cursor.execute(
+        "INSERT INTO entry_versions (entry_id, version, editor, date, is_snapshot, data) VALUES (?, ?, ?, ?, ?, ?);",
+        (entryID, version, editorID, timestamp, isSnapshot, data)
+    )
+    return version
+
+
+def rebuildEntryVersion(cursor: sqlite3.Cursor, entryID: int, version: int, knownVersions: dict = None) -> str:
+    """
+    Rebuild an entry's text as it was at `version`: start from the nearest snapshot at or before it and replay the deltas after that,
+    so it never takes more than `dbSnapshotInterval` steps.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor to read with.
+        entryID (int): The entry's ID.
+        version (int): The version to rebuild.
+        knownVersions (dict): Optional; (entry ID, version) -> text of versions that were already rebuilt. If the previous version is in there,
+            only one delta is applied. Every version rebuilt along the way is added to it.
+
+    Returns:
+        str: The text, or None if the entry has no such version.
+    """
+    if knownVersions is not None and (entryID, version) in knownVersions:
+        return knownVersions[(entryID, version)]
+
+    if knownVersions is not None and (entryID, version - 1) in knownVersions:
+        cursor.execute("SELECT is_snapshot, data FROM entry_versions WHERE entry_id = ? AND version = ?;", (entryID, version))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        text = unpackSnapshot(row[1]) if row[0] else applyDelta(knownVersions[(entryID, version - 1)], row[1])
+        knownVersions[(entryID, version)] = text
+        return text
+
+    cursor.execute("""
+    SELECT version, is_snapshot, data FROM entry_versions
+    WHERE entry_id = ? AND version <= ? AND version >= (
+        SELECT MAX(version) FROM entry_versions WHERE entry_id = ? AND version <= ? AND is_snapshot = 1
+    )
+    ORDER BY version;
+    """, (entryID, version, entryID, version))
+    rows = cursor.fetchall()
+    if not rows or rows[-1][0] != version:
+        return None
+
+    text = None
+    for rowVersion, isSnapshot, data in rows:
+        text = unpackSnapshot(data) if isSnapshot else applyDelta(text, data)
+        if knownVersions is not None:
+            knownVersions[(entryID, rowVersion)] = text
+    return text
+
+
+def migrateEntryHistory(cursor: sqlite3.Cursor):
+    """
+    Move the history of entries that predate `entry_versions` into it. Committing is up to the caller.
+    The old `edits` rows only hold unified diffs, so the older versions are worked out by undoing them one by one, starting from the current text.
+    Migrated `edits` rows are deleted; if an entry's diffs don't add up, its rows are left alone and only its current text is kept as a version.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor to work with.
+
+    Returns:
+        None.
+    """
+    cursor.execute("SELECT id, name, text FROM entries WHERE id NOT IN (SELECT entry_id FROM entry_versions);")
+    unversionedEntries = cursor.fetchall()
+    if not unversionedEntries:
+        return
+
+    versionRows = [] # (sort key, entry ID, text, editor, date); sorted so the new rows keep the order the edits were made in
+    migratedEntryIDs = []
+    for entryID, entryName, entryText in unversionedEntries:
+        cursor.execute("SELECT id, editor, date, diff FROM edits WHERE entry_id = ? ORDER BY id;", (entryID,))
+        edits = cursor.fetchall()
+
+        texts = [entryText]
+        try:
+            for edit in reversed(edits):
+                texts.insert(0, revertUnifiedDiff(texts[0], edit[3]))
+        except ValueError as error:
+            logging.warning(f"[migrateEntryHistory] Couldn't undo the edits of `{entryName}` ({error}), its versions start from its current text; "
+                            "the old edits are kept as they are and still show up in getEditsPage")
+            versionRows.append(((0, entryID), entryID, entryText, 0, None))
+            continue
+
+        versionRows.append(((0, entryID), entryID, texts[0], 0, None)) # when an entry was made was never recorded
+        for edit, text in zip(edits, texts[1:]):
+            versionRows.append(((1, edit[0]), entryID, text, edit[1], edit[2]))
+        migratedEntryIDs.append(entryID)
+
+    previousTexts = {}
+    for _, entryID, text, editorID, date in sorted(versionRows, key=lambda row: row[0]):
+        saveEntryVersion(cursor, entryID, text, editorID, date, previousTexts.get(entryID))
+        previousTexts[entryID] = text
+
+    cursor.executemany("DELETE FROM edits WHERE entry_id = ?;", [(entryID,) for entryID in migratedEntryIDs])
+    logging.info(f"[migrateEntryHistory] Moved the history of {len(unversionedEntries)} entries to entry_versions")
+
+
+def getEntryVersion(entryName: str, version: int) -> str:
+    """
+    Fetch the contents an entry had at some point in its history.
+
+    Args:
+        entryName (str): The name of the entry.
+        version (int): The version; 0 is the entry as it was added, and every edit adds one.
+
+    Returns:
+        str: The entry's contents at that version OR a status code:
+            - "NoEntry": If an entry with the specified name does not exist.
+            - "NoVersion": If the entry has no such version.
+
+    Raises:
+        None.
+    """
+    with databankConnection() as conn:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT id FROM entries WHERE name = ?;", (entryName,))
+            response = cursor.fetchone()
+            if not response:
+                logging.error(f"[getEntryVersion] Unable to fetch entry `{entryName}`.")
+                return "NoEntry"
+
+            text = rebuildEntryVersion(cursor, response[0], version)
+            if text is None:
+                logging.error(f"[getEntryVersion] `{entryName}` has no version {version}.")
+                return "NoVersion"
+            return text
+
+
 def addEntry(entryName, entryText):
     """
     Add a new entry into the databank.
@@ -51,14 +566,19 @@ def addEntry(entryName, entryText):
     Raises:
         ValueError: if the entry already exists.
     """
-    with closing(sqlite3.connect(firmStates.dbFilePath)) as conn:
+    with databankConnection() as conn:
         with closing(conn.cursor()) as cursor:
             try:
                 cursor.execute(
                     "INSERT INTO entries (name, text) VALUES (?, ?);",
                     (entryName, entryText),
                 )
+                entryID = cursor.lastrowid
+                indexEntryChunks(cursor, entryID, entryText)
+                saveEntryVersion(cursor, entryID, entryText, 0, int(time.time()))
                 conn.commit()
+                bumpEntryRevision(entryName)
+                updateEntryNames(entryName, True)
                 logging.info(f"[addEntry] `{entryName}` added!")
             except sqlite3.IntegrityError:
                 raise ValueError(f"[addEntry] `{entryName}` already exists.")
@@ -66,7 +586,7 @@ def addEntry(entryName, entryText):
 
 def editEntry(entryName: str, newText: str, editorID: str = "0"):
     """
-    Changes an existing entry's contents to `newText` and logs the changes in the `edits` table.
+    Changes an existing entry's contents to `newText` and logs the new version in the `entry_versions` table (see `saveEntryVersion`).
     Upon an entry edit, the differences between the new text and the old text will be logged, along with the `editorID` (intended to be a Discord account ID) and the UNIX timestamp at which the edit occurred.
 
     Args:
@@ -83,17 +603,6 @@ def editEntry(entryName: str, newText: str, editorID: str = "0"):
     Raises:
         None.
     """
-    oldText = getEntryContent(entryName)
-
-    # not ideal but cba to do enums or custom exceptions yet
-    if oldText == "NoEntry" or oldText == "EntryGone":
-        return oldText
-    
-    diff = unified_diff(oldText.splitlines(), newText.splitlines(), lineterm='')
-    diff = "\n".join(list(diff))
-    if not diff:
-        diff = "[No changes...]"
-
     timestamp = int(time.time())
 
     if editorID == "0":
@@ -101,29 +610,154 @@ def editEntry(entryName: str, newText: str, editorID: str = "0"):
     else:
         logging.info(f"[editEntry] `{editorID}` requested an edit...")
 
-    with closing(sqlite3.connect(firmStates.dbFilePath)) as conn:
+    with databankConnection() as conn:
         with closing(conn.cursor()) as cursor:
+            # the old text is the base of the new version's delta, so it's read with the write lock already held:
+            # another edit (from the other databank thread or from outside the bot) can't slip in between the read and the write
+            cursor.execute("BEGIN IMMEDIATE;")
+            cursor.execute("SELECT id, is_deleted, text FROM entries WHERE name = ?;", (entryName,))
+            response = cursor.fetchone()
+
+            # not ideal but cba to do enums or custom exceptions yet
+            if not response:
+                conn.rollback()
+                logging.error(f"[editEntry] Unable to fetch entry `{entryName}`.")
+                return "NoEntry"
+            if response[1] == 1:
+                conn.rollback()
+                logging.error(f"[editEntry] Entry `{entryName}` has been removed.")
+                return "EntryGone"
+            entryID, _, oldText = response
+
             query = """
             UPDATE entries
             SET text = ?
-            WHERE name = ?; 
+            WHERE id = ?; 
             """
-            cursor.execute(query, (newText, entryName,))
+            cursor.execute(query, (newText, entryID,))
 
-            query = """
-            SELECT entries.id FROM entries
-            WHERE entries.name = ?;
-            """
-            cursor.execute(query, (entryName,))
-            entryID = cursor.fetchone()[0]
+            saveEntryVersion(cursor, entryID, newText, editorID, timestamp, oldText)
+            indexEntryChunks(cursor, entryID, newText)
+            conn.commit()
+
+    bumpEntryRevision(entryName)
+    logging.info(f"[editEntry] `{entryName}` edited by {editorID}.")
+
+
+def importEntries(entries: list, editorID: str = "0", workerProcesses: int = None) -> dict:
+    """
+    Add or update many entries at once, e.g. to seed or migrate the databank. Entries that don't exist are added, ones that do are edited
+    (with a version logged, like `editEntry` does) and ones whose text hasn't changed are left alone; whether an entry is deleted isn't touched.
+    Deltas and passage vectors are worked out in a process pool, then everything is written in one transaction.
+
+    Args:
+        entries (list): Dictionaries with the entries' names and contents, like `getEntries` returns. If a name appears more than once, the last one wins.
+        editorID (str): The ID of the editor the edits are logged under. Defaults to 0.
+        workerProcesses (int): How many processes work out deltas and vectors. Defaults to the number of CPUs.
+
+    Returns:
+        dict: How many entries were "added", "edited" and "unchanged".
+
+    Raises:
+        None.
+    """
+    newTexts = {entry["name"]: entry["text"] for entry in entries}
+    timestamp = int(time.time())
+    snapshotInterval = getSnapshotInterval()
+
+    def readEntryStates(cursor: sqlite3.Cursor) -> dict: # name -> (ID, text, last version) of the entries that already exist
+        entryStates = {}
+        names = list(newTexts)
+        for start in range(0, len(names), 500): # stays under SQLite's limit on query parameters
+            batch = names[start:start + 500]
+            cursor.execute(f"""
+            SELECT entries.id, entries.name, entries.text, MAX(entry_versions.version)
+            FROM entries
+            LEFT JOIN entry_versions ON entry_versions.entry_id = entries.id
+            WHERE entries.name IN ({", ".join("?" * len(batch))})
+            GROUP BY entries.id;
+            """, batch)
+            entryStates.update({name: (entryID, text, lastVersion) for entryID, name, text, lastVersion in cursor.fetchall()})
+        return entryStates
+
+    def planImport(entryStates: dict) -> tuple[list, list, list]: # the names to add, to edit, and to store as a delta rather than a snapshot
+        addedNames = [name for name in newTexts if name not in entryStates]
+        editedNames = [name for name in newTexts if name in entryStates and entryStates[name][1] != newTexts[name]]
+        # an entry that predates entry_versions and somehow wasn't migrated gets a snapshot to start from
+        deltaNames = [name for name in editedNames if entryStates[name][2] is not None and (entryStates[name][2] + 1) % snapshotInterval]
+        return addedNames, editedNames, deltaNames
+
+    with databankConnection() as conn:
+        with closing(conn.cursor()) as cursor:
+            existingEntries = readEntryStates(cursor)
+            addedNames, editedNames, deltaNames = planImport(existingEntries)
+            changedNames = addedNames + editedNames
+
+            if len(changedNames) > 1:
+                with ProcessPoolExecutor(max_workers=workerProcesses) as pool:
+                    chunkLists = list(pool.map(vectorizeChunks, [newTexts[name] for name in changedNames], chunksize=16))
+                    deltas = list(pool.map(makeDelta, [existingEntries[name][1] for name in deltaNames], [newTexts[name] for name in deltaNames], chunksize=16))
+            else: # not worth starting processes for
+                chunkLists = [vectorizeChunks(newTexts[name]) for name in changedNames]
+                deltas = [makeDelta(existingEntries[name][1], newTexts[name]) for name in deltaNames]
+            chunkLists = dict(zip(changedNames, chunkLists))
+            deltas = {name: (existingEntries[name], delta) for name, delta in zip(deltaNames, deltas)}
+
+            # the deltas are only valid against the texts they were made from, so the entries are read again with the write lock held;
+            # whatever the bot (or anything else) changed in the meantime is worked out again here
+            cursor.execute("BEGIN IMMEDIATE;")
+            currentEntries = readEntryStates(cursor)
+            if currentEntries != existingEntries:
+                addedNames, editedNames, deltaNames = planImport(currentEntries)
+                changedNames = addedNames + editedNames
+                for name in changedNames:
+                    if name not in chunkLists:
+                        chunkLists[name] = vectorizeChunks(newTexts[name])
+                for name in deltaNames:
+                    if name not in deltas or deltas[name][0] != currentEntries[name]:
+                        deltas[name] = (currentEntries[name], makeDelta(currentEntries[name][1], newTexts[name]))
+                logging.info("[importEntries] The databank changed while the import was being prepared, caught up")
+            existingEntries = currentEntries
+            deltas = {name: deltas[name][1] for name in deltaNames}
 
-            cursor.execute(
-                "INSERT INTO edits (entry_id, editor, date, diff) VALUES (?, ?, ?, ?);",
-                (entryID, editorID, timestamp, diff,)
+            cursor.executemany(
+                "INSERT INTO entries (name, text) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET text = excluded.text;",
+                [(name, newTexts[name]) for name in changedNames]
+            )
+
+            entryIDs = {name: existingEntries[name][0] for name in editedNames}
+            for start in range(0, len(addedNames), 500):
+                batch = addedNames[start:start + 500]
+                cursor.execute(f"SELECT name, id FROM entries WHERE name IN ({', '.join('?' * len(batch))});", batch)
+                entryIDs.update(cursor.fetchall())
+
+            versionRows = []
+            for name in changedNames:
+                lastVersion = existingEntries[name][2] if name in existingEntries else None
+                version = 0 if lastVersion is None else lastVersion + 1
+                if name in deltas:
+                    versionRows.append((entryIDs[name], version, editorID, timestamp, False, deltas[name]))
+                else:
+                    versionRows.append((entryIDs[name], version, editorID, timestamp, True, packSnapshot(newTexts[name])))
+            cursor.executemany(
+                "INSERT INTO entry_versions (entry_id, version, editor, date, is_snapshot, data) VALUES (?, ?, ?, ?, ?, ?);",
+                versionRows
+            )
+
+            cursor.executemany("DELETE FROM entry_chunks WHERE entry_id = ?;", [(entryIDs[name],) for name in editedNames])
+            cursor.executemany(
+                "INSERT INTO entry_chunks (entry_id, chunk_index, text, vector) VALUES (?, ?, ?, ?);",
+                [(entryIDs[name], chunkIndex, chunk, vector) for name in changedNames for chunkIndex, (chunk, vector) in enumerate(chunkLists[name])]
             )
             conn.commit()
 
-    logging.info(f"[editEntry] `{entryName}` edited by {editorID}.")
+    for name in changedNames:
+        bumpEntryRevision(name)
+    for name in addedNames:
+        updateEntryNames(name, True)
+
+    logging.info(f"[importEntries] {len(addedNames)} added, {len(editedNames)} edited, {len(newTexts) - len(changedNames)} unchanged")
+    return {"added": len(addedNames), "edited": len(editedNames), "unchanged": len(newTexts) - len(changedNames)}
 
 
 class Visibility(Enum):
@@ -147,7 +781,7 @@ def changeEntryVisibility(entryName: str, action: Visibility):
     Raises:
         None.
     """
-    with closing(sqlite3.connect(firmStates.dbFilePath)) as conn:
+    with databankConnection() as conn:
         with closing(conn.cursor()) as cursor:
             query = """
             UPDATE entries
@@ -155,44 +789,107 @@ def changeEntryVisibility(entryName: str, action: Visibility):
             WHERE name = ?;
             """
             cursor.execute(query, (action.value, entryName,))
+            entryExists = cursor.rowcount > 0
             conn.commit()
 
+    bumpEntryRevision(entryName)
+    if entryExists:
+        updateEntryNames(entryName, action == Visibility.RESTORE)
 
-def getEdits(entryName: str = None) -> list:
+
+# edits that couldn't be migrated to entry_versions (see migrateEntryHistory) keep their own IDs in getEditsPage;
+# versions are numbered after them, so one edit ID keeps paging through both
+legacyEditIDOffset = 1 << 40
+
+def getEditsPage(entryName: str = None, afterEditID: int = 0, limit: int = 200) -> list:
     """
-    Fetch a list of edits that were made to the databank.
-    Behavior changes based on the args passed:
-    - If `entryName` is not passed, a list of all edits ever made to the database is returned.
-    - If `entryName` is passed, a list of all edits ever made to the specified entry is returned.
-    
+    Fetch one page of the edits that were made to the databank, oldest first.
+    Pages are keyed on the edit ID rather than an offset, so every page costs the same no matter how deep into the history it is.
+    Edits are stored as versions (see `saveEntryVersion`); their diffs are worked out here, rebuilding each version once per page.
+    Edits of entries whose history couldn't be migrated to versions are still in the `edits` table, and come first.
+    - If `entryName` is not passed, edits to any entry are returned.
+    - If `entryName` is passed, only edits made to the specified entry are returned.
+
     Args:
         entryName (str): The name of an entry to see edits of.
-    
+        afterEditID (int): The ID of the last edit of the previous page; 0 for the first page.
+        limit (int): The maximum number of edits in the page.
+
     Returns:
-        list: An appropriate list of edits.
+        list: Tuples of (edit ID, entry name, editor, date, diff). Fewer than `limit` of them means it's the last page.
 
     Raises:
         None.
     """
-    with closing(sqlite3.connect(firmStates.dbFilePath)) as conn:
+    nameFilter = "AND entries.name = ?" if entryName else ""
+    nameParameter = (entryName,) if entryName else ()
+
+    with databankConnection() as conn:
         with closing(conn.cursor()) as cursor:
-            if entryName:
-                query = "SELECT id FROM entries WHERE name = ?;"
-                cursor.execute(query, (entryName,))
-                entryID = cursor.fetchone()[0]
+            page = []
+            if afterEditID < legacyEditIDOffset:
+                cursor.execute(f"""
+                SELECT edits.id, entries.name, edits.editor, edits.date, edits.diff
+                FROM edits
+                JOIN entries ON edits.entry_id = entries.id
+                WHERE edits.id > ? {nameFilter}
+                ORDER BY edits.id
+                LIMIT ?;
+                """, (afterEditID, *nameParameter, limit))
+                page = cursor.fetchall()
+                afterVersionID = 0
+            else:
+                afterVersionID = afterEditID - legacyEditIDOffset
 
-                query = "SELECT editor, date, diff FROM edits WHERE entry_id = ?;"
-                cursor.execute(query, (entryID,))
-                edits = cursor.fetchall()
+            if len(page) == limit:
+                return page
 
-                return [(entryName, edit[0], edit[1], edit[2]) for edit in edits]
-            else:
-                cursor.execute("""
-                SELECT entries.name, edits.editor, edits.date, edits.diff
-                FROM edits
-                JOIN entries ON edits.entry_id = entries.id;
-                """)
-                return cursor.fetchall()
+            # version 0 is the entry being added, which isn't an edit
+            cursor.execute(f"""
+            SELECT entry_versions.id, entries.name, entry_versions.editor, entry_versions.date, entry_versions.entry_id, entry_versions.version
+            FROM entry_versions
+            JOIN entries ON entry_versions.entry_id = entries.id
+            WHERE entry_versions.version > 0 AND entry_versions.id > ? {nameFilter}
+            ORDER BY entry_versions.id
+            LIMIT ?;
+            """, (afterVersionID, *nameParameter, limit - len(page)))
+            versions = cursor.fetchall()
+
+            knownVersions = {}
+            for versionID, name, editorID, date, entryID, version in versions:
+                oldText = rebuildEntryVersion(cursor, entryID, version - 1, knownVersions)
+                newText = rebuildEntryVersion(cursor, entryID, version, knownVersions)
+                diff = "\n".join(unified_diff(oldText.splitlines(), newText.splitlines(), lineterm=''))
+                page.append((legacyEditIDOffset + versionID, name, editorID, date, diff or "[No changes...]"))
+            return page
+
+
+def getEdits(entryName: str = None, pageSize: int = 200):
+    """
+    Iterate over the edits that were made to the databank, oldest first, fetching them a page at a time (see `getEditsPage`).
+    Behavior changes based on the args passed:
+    - If `entryName` is not passed, every edit ever made to the database is yielded.
+    - If `entryName` is passed, every edit ever made to the specified entry is yielded.
+
+    Args:
+        entryName (str): The name of an entry to see edits of.
+        pageSize (int): How many edits are fetched at once.
+
+    Yields:
+        tuple: (entry name, editor, date, diff) for each edit.
+
+    Raises:
+        None.
+    """
+    afterEditID = 0
+    while True:
+        page = getEditsPage(entryName, afterEditID, pageSize)
+        for edit in page:
+            yield edit[1:]
+
+        if len(page) < pageSize:
+            return
+        afterEditID = page[-1][0]
 
 
 def getEntries() -> list:
@@ -208,7 +905,7 @@ def getEntries() -> list:
     Raises:
         None.
     """
-    with closing(sqlite3.connect(firmStates.dbFilePath)) as conn:
+    with databankConnection() as conn:
         with closing(conn.cursor()) as cursor:
             cursor.execute("SELECT name, text FROM entries WHERE is_deleted = FALSE;",)
             entries = cursor.fetchall()
@@ -217,7 +914,7 @@ def getEntries() -> list:
 
 def getEntryContent(entryName: str) -> str:
     """
-    Fetch the contents of a specific entry.
+    Fetch the contents of a specific entry. Recently used entries are served from `entryContentCache` without touching the databank.
     
     Args:
         entryName (str): The name of the entry.
@@ -230,7 +927,29 @@ def getEntryContent(entryName: str) -> str:
     Raises:
         None.
     """
-    with closing(sqlite3.connect(firmStates.dbFilePath)) as conn:
+    cacheKey = (entryName, getEntryRevision(entryName)) # taken before reading, so a change made meanwhile files the result under an outdated key
+    entryContent = entryContentCache.get(cacheKey)
+    if entryContent is None:
+        entryContent = fetchEntryContent(entryName)
+        entryContentCache.put(cacheKey, entryContent)
+        logging.debug(f"[getEntryContent] `{entryName}` wasn't cached, {entryContentCache}")
+    return entryContent
+
+
+def fetchEntryContent(entryName: str) -> str:
+    """
+    Read the contents of a specific entry from the databank, bypassing `entryContentCache`. See `getEntryContent`.
+    
+    Args:
+        entryName (str): The name of the entry.
+    
+    Returns:
+        str: The entry's contents OR a status code ("NoEntry", "EntryGone").
+    
+    Raises:
+        None.
+    """
+    with databankConnection() as conn:
         with closing(conn.cursor()) as cursor:
             cursor.execute("SELECT is_deleted, text FROM entries WHERE name = ?", (entryName,))
             response = cursor.fetchone()
@@ -246,6 +965,127 @@ def getEntryContent(entryName: str) -> str:
             return response[1]
 
 
+def searchEntries(query: str, limit: int = 5) -> list:
+    """
+    Full-text search the databank. Entries marked as removed are not returned.
+    The query is split into words and any of them may match (as a word or the start of one); entries are ranked by relevance, with matches in the name weighing more.
+
+    Args:
+        query (str): What to look for.
+        limit (int): The maximum number of results.
+
+    Returns:
+        list: A list of dictionaries that contain the entries' names and a snippet of the text around the matches, best match first.
+
+    Raises:
+        None.
+    """
+    # quoting every word keeps FTS5 query syntax (AND, NEAR, column filters, ...) out of it, and the prefix match lets "fast" find "fastest"
+    matchExpression = " OR ".join(f'"{word}"*' for word in re.findall(r"\w+", query))
+    if not matchExpression:
+        return []
+
+    with databankConnection() as conn:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("""
+            SELECT entries.name, snippet(entries_fts, 1, '', '', '...', 48)
+            FROM entries_fts
+            JOIN entries ON entries.id = entries_fts.rowid
+            WHERE entries_fts MATCH ? AND entries.is_deleted = FALSE
+            ORDER BY bm25(entries_fts, 10.0, 1.0)
+            LIMIT ?;
+            """, (matchExpression, limit))
+            return [{"name": result[0], "snippet": result[1]} for result in cursor.fetchall()]
+
+
+# every passage and its vector, kept in memory per entry: entry name -> (entry revision, [passage, ...], [vector, ...]);
+# when the databank changes, only the entries whose revision moved are read again
+passageIndex = {}
+# the same passages flattened for topChunks: (databank revision, [(entry name, passage), ...], [vector, ...])
+passageCache = (None, [], [])
+passageLock = threading.Lock() # both databank threads search, only one should refresh
+
+def refreshPassages():
+    """
+    Bring `passageIndex` and `passageCache` up to date with the databank. The first call loads every passage;
+    after that only the passages of entries that were added, edited, removed or restored since the last call are read again.
+
+    Args, Returns, Raises:
+        None.
+    """
+    global passageCache
+
+    with revisionLock: # taken before reading, so an edit landing during the read just gets picked up next time
+        currentRevision = databankRevision
+        revisions = dict(entryRevisions)
+
+    fullLoad = passageCache[0] is None
+    staleNames = [name for name, revision in revisions.items() if name not in passageIndex or passageIndex[name][0] != revision]
+
+    query = """
+    SELECT entries.name, entry_chunks.text, entry_chunks.vector
+    FROM entry_chunks
+    JOIN entries ON entry_chunks.entry_id = entries.id
+    WHERE entries.is_deleted = FALSE {}
+    ORDER BY entry_chunks.entry_id, entry_chunks.chunk_index;
+    """
+    rows = []
+    with databankConnection() as conn:
+        with closing(conn.cursor()) as cursor:
+            if fullLoad:
+                cursor.execute(query.format(""))
+                rows = cursor.fetchall()
+            else:
+                for start in range(0, len(staleNames), 500): # stays under SQLite's limit on query parameters
+                    batch = staleNames[start:start + 500]
+                    cursor.execute(query.format(f"AND entries.name IN ({', '.join('?' * len(batch))})"), batch)
+                    rows.extend(cursor.fetchall())
+
+    loaded = {}
+    for name, text, vector in rows:
+        loaded.setdefault(name, ([], []))
+        loaded[name][0].append(text)
+        loaded[name][1].append(array("f", vector))
+
+    if fullLoad:
+        passageIndex.clear()
+    for name in loaded.keys() | set(staleNames):
+        if name in loaded:
+            passageIndex[name] = (revisions.get(name, 0), *loaded[name])
+        else: # removed, or nothing to index
+            passageIndex.pop(name, None)
+
+    passages = [(name, text) for name, (_, texts, _) in passageIndex.items() for text in texts]
+    vectors = [vector for _, _, entryVectors in passageIndex.values() for vector in entryVectors]
+    passageCache = (currentRevision, passages, vectors)
+    logging.debug(f"[refreshPassages] Read {len(rows)} passages of {len(loaded) if fullLoad else len(staleNames)} entries, {len(passages)} in total")
+
+
+def searchPassages(query: str, limit: int = 3) -> list:
+    """
+    Find the passages of the databank that are the most similar to a question. Entries marked as removed are not searched.
+    The passages stay in memory; after a change only the entries that changed are read again (see `refreshPassages`).
+
+    Args:
+        query (str): The question.
+        limit (int): The maximum number of results.
+
+    Returns:
+        list: A list of dictionaries that contain the entries' names, the passages and their similarity scores, best match first.
+
+    Raises:
+        None.
+    """
+    if passageCache[0] != databankRevision:
+        with passageLock:
+            if passageCache[0] != databankRevision:
+                refreshPassages()
+
+    _, passages, vectors = passageCache
+    results = topChunks(vectorizeText(query), vectors, limit)
+    return [{"name": passages[index][0], "passage": passages[index][1], "score": score} for score, index in results]
+
+
 logging.debug("[db_handler Initialization] Started")
 
 firmStates = firmStateSet()
@@ -256,6 +1096,6 @@ if not firmStates.dbSchemaPath:
 
 if not os.path.isfile(firmStates.dbFilePath):
     logging.debug(f"[db_handler Initialization] {firmStates.dbFilePath} does not exist, creating one now...")
-    initDB()
+initDB() # also adds whatever a newer schema brings to an existing database
 
 logging.info(f"[db_handler Initialization] Finished with schema at {firmStates.dbSchemaPath} and database at {firmStates.dbFilePath}")
\ No newline at end of file
@@ -1,14 +1,13 @@
 # This file generates the weekly event list for ZGR Weekly Time Trial.
+from template_handler import renderTemplate
+
 from io_handler import ioScopes
 from io_handler import ioRead
 
 from enum import Enum, auto
 import datetime
-import logging
 import random
-import time
 import sys
-import re
 
 class GameChoice(Enum):
     HD = auto()
@@ -199,39 +198,32 @@ def generateEventList() -> str:
     year, week_num, day_of_week = currentDateTime.isocalendar()
 
     pingId = ioRead(ioScopes.config, "zgrRolePing")
-    template = ioRead(ioScopes.md, "event_gen_template.md")
+    templateName = "event_gen_template.md"
     match int(week_num) % 2:
         case 0:
-            template = ioRead(ioScopes.md, "event_gen_template_pulse.md")
+            templateName = "event_gen_template_pulse.md"
         case 1:
-            template = ioRead(ioScopes.md, "event_gen_template_2048.md")
-
-    template = template.replace("!PING", pingId)\
-    .replace("!YEAR", str(year))\
-    .replace("!WEEK", str(week_num))\
-    .replace("!DEADLINE", f"<t:{getDeadlineTimestamp(week_num, year)}:R>")
-
-    timeoutCounter = 0
-    while re.search("![A-Z0-9]+", template):
-        template = template.replace("!TRACK2048", generateRandomTrack(GameChoice.W2048), 1)\
-        .replace("!CLASS2048", generateRandomClass(GameChoice.W2048), 1)\
-        .replace("!SHIP2048", generateRandomShip(GameChoice.W2048), 1)\
-\
-        .replace("!TRACKHD", generateRandomTrack(GameChoice.HD), 1)\
-        .replace("!CLASSHD", generateRandomClass(GameChoice.HD), 1)\
-        .replace("!SHIPHD", generateRandomShip(GameChoice.HD), 1)\
-        .replace("!ZONEHD", generateRandomTrack(GameChoice.HDZONE), 1)\
-\
-        .replace("!TRACKPULSEDLC", generateRandomTrack(GameChoice.PULSEDLC), 1)\
-        .replace("!TRACKPULSE", generateRandomTrack(GameChoice.PULSE), 1)\
-        .replace("!CLASSPULSE", generateRandomClass(GameChoice.PULSE), 1)\
-        .replace("!SHIPPULSEDLC", generateRandomShip(GameChoice.PULSEDLC), 1)\
-        .replace("!SHIPPULSE", generateRandomShip(GameChoice.PULSE), 1)
-        timeoutCounter += 1
-        if timeoutCounter > 24:
-            logging.warning("[generateEventList] Exceeded maximum attempt counter, aborting...")
-            break
-        else:
-            time.sleep(0.1)
-
-    return template
+            templateName = "event_gen_template_2048.md"
+
+    # random keywords are callables so that every occurrence gets its own value
+    return renderTemplate(templateName, {
+        "!PING": pingId,
+        "!YEAR": str(year),
+        "!WEEK": str(week_num),
+        "!DEADLINE": f"<t:{getDeadlineTimestamp(week_num, year)}:R>",
+
+        "!TRACK2048": lambda: generateRandomTrack(GameChoice.W2048),
+        "!CLASS2048": lambda: generateRandomClass(GameChoice.W2048),
+        "!SHIP2048": lambda: generateRandomShip(GameChoice.W2048),
+
+        "!TRACKHD": lambda: generateRandomTrack(GameChoice.HD),
+        "!CLASSHD": lambda: generateRandomClass(GameChoice.HD),
+        "!SHIPHD": lambda: generateRandomShip(GameChoice.HD),
+        "!ZONEHD": lambda: generateRandomTrack(GameChoice.HDZONE),
+
+        "!TRACKPULSEDLC": lambda: generateRandomTrack(GameChoice.PULSEDLC),
+        "!TRACKPULSE": lambda: generateRandomTrack(GameChoice.PULSE),
+        "!CLASSPULSE": lambda: generateRandomClass(GameChoice.PULSE),
+        "!SHIPPULSEDLC": lambda: generateRandomShip(GameChoice.PULSEDLC),
+        "!SHIPPULSE": lambda: generateRandomShip(GameChoice.PULSE)
+    }, maxUses=24)
@@ -17,7 +17,10 @@ CREATE TABLE IF NOT EXISTS edits (
     FOREIGN KEY (entry_id) REFERENCES entries (id)
 );
 
-CREATE TRIGGER deletion_timestamping
+CREATE INDEX IF NOT EXISTS edits_entry_id ON edits (entry_id);
+CREATE INDEX IF NOT EXISTS edits_date ON edits (date);
+
+CREATE TRIGGER IF NOT EXISTS deletion_timestamping
 BEFORE UPDATE ON entries
 FOR EACH ROW
 BEGIN
@@ -27,4 +30,59 @@ BEGIN
         ELSE NULL
     END
     WHERE id = NEW.id;
-END;
\ No newline at end of file
+END;
+
+-- entries split into passages, each with a vector from text_vectors.vectorizeText (512 float32s), kept up to date by db_handler
+CREATE TABLE IF NOT EXISTS entry_chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id INTEGER NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    FOREIGN KEY (entry_id) REFERENCES entries (id)
+);
+
+CREATE INDEX IF NOT EXISTS entry_chunks_entry_id ON entry_chunks (entry_id);
+
+-- full-text index over the entries, kept in sync by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    name,
+    text,
+    content='entries',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS entries_fts_insert
+AFTER INSERT ON entries
+BEGIN
+    INSERT INTO entries_fts (rowid, name, text) VALUES (new.id, new.name, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_fts_delete
+AFTER DELETE ON entries
+BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entries_fts_update
+AFTER UPDATE OF name, text ON entries
+BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name, text) VALUES ('delete', old.id, old.name, old.text);
+    INSERT INTO entries_fts (rowid, name, text) VALUES (new.id, new.name, new.text);
+END;
+
+-- every version of every entry, newest edits last (see db_handler.saveEntryVersion): every `dbSnapshotInterval`th version is stored whole,
+-- the ones in between as a delta against the version before (text_deltas.makeDelta), so rebuilding any version replays a bounded number of deltas;
+-- this replaces the unified diffs in `edits`, which is only kept around for entries whose old history couldn't be migrated
+CREATE TABLE IF NOT EXISTS entry_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entry_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    editor INTEGER NOT NULL,
+    date TIMESTAMP,
+    is_snapshot INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    FOREIGN KEY (entry_id) REFERENCES entries (id),
+    UNIQUE (entry_id, version)
+);
@@ -15,13 +15,20 @@ from discord.ext import tasks
 
 from oai_interface import llmFetchResponse
 
+from message_composer import paginateStatus
 from message_composer import composeStatus
 
+from net_handler import closeSession
+
+from template_handler import renderTemplate
+
 from states import volatileStateSet
 from states import firmStateSet
 from states import llmStateSet
 
+from io_handler import configReload
 from io_handler import ioScopes
+from io_handler import ioWrite
 from io_handler import ioRead
 
 from db_handler import *
@@ -33,6 +40,8 @@ import discord
 import logging
 import asyncio
 import random
+import time
+import tempfile
 import sys
 import re
 import os
@@ -52,6 +61,10 @@ class Client(discord.Client):
     async def setup_hook(self):
         await commandTree.sync()
 
+    async def close(self):
+        await closeSession()
+        await super().close()
+
 client = Client(intents=discord.Intents.default())
 
 commandTree = app_commands.CommandTree(client)
@@ -65,29 +78,70 @@ except Exception as e:
     logging.error(f"Logging setup failed with {e}; defaulting to INFO")
 
 
-async def updateStatusMessage(desiredContent): # abstract of edit/send new message in status channel
+def rememberStatusMessages(messageIds): # keep the status page IDs around, even across restarts
+    volatileStates.statusMessageIDs = list(messageIds)
+    ioWrite(ioScopes.state, "status_message.json", {"channelID": firmStates.channel.id, "messageIDs": volatileStates.statusMessageIDs})
+
+async def findStatusMessages(pageCount): # the board is the run of our own messages at the bottom of the channel
+    volatileStates.statusHistoryScans += 1
+    messageIds = []
+    async for previous_message in firmStates.channel.history(limit=max(pageCount, len(volatileStates.statusMessageIDs)) + 1):
+        if previous_message.author != client.user:
+            break
+        messageIds.append(previous_message.id)
+
+    messageIds.reverse() # history is newest first, pages go oldest first
+    logging.debug(f"[findStatusMessages] Found {len(messageIds)} status messages")
+    return messageIds
+
+async def publishStatusPages(pages, messageIds, publishedPages): # page N goes to message N, only changed pages are touched
+    pageIds = []
+
+    for index, page in enumerate(pages):
+        if index >= len(messageIds):
+            newMessage = await firmStates.channel.send(page)
+            pageIds.append(newMessage.id)
+            logging.info(f"[publishStatusPages] Status page {index + 1} posted, new message ID: {str(newMessage.id)}")
+            continue
+
+        if index < len(publishedPages) and publishedPages[index] == page:
+            volatileStates.statusApiCallsSaved += 1
+        else:
+            await firmStates.channel.get_partial_message(messageIds[index]).edit(content=page)
+            logging.debug(f"[publishStatusPages] Status page {index + 1} updated!")
+        pageIds.append(messageIds[index])
+
+    for surplusId in messageIds[len(pages):]:
+        try:
+            await firmStates.channel.get_partial_message(surplusId).delete()
+            logging.info(f"[publishStatusPages] Removed surplus status page {str(surplusId)}")
+        except discord.NotFound:
+            pass
+
+    volatileStates.statusPagesCache = list(pages)
+    if pageIds != volatileStates.statusMessageIDs:
+        rememberStatusMessages(pageIds)
+
+async def updateStatusMessage(desiredContent): # abstract of edit/send new messages in status channel
 
     if volatileStates.statusMessageCache == desiredContent:
         logging.debug("[updateStatusMessage] desiredContent matches cache, aborting!")
         return("nothingToDo")
     logging.debug("[updateStatusMessage] Status message update routine started")
-    existingMessageId = 0
-    volatileStates.statusMessageCache = desiredContent
-
-    async for previous_message in firmStates.channel.history(limit=2):
-        if previous_message.author == client.user:
-            existingMessageId = previous_message.id
-            logging.debug("[updateStatusMessage] existingMessageId defined!")
+    pages = paginateStatus(desiredContent)
 
-    if existingMessageId == 0:
-        newMessage = await firmStates.channel.send(desiredContent)
-        existingMessageId = newMessage.id
-        logging.info(f"[updateStatusMessage] Status message not found, new message ID: {str(existingMessageId)}")
+    # the usual case: we know the pages, so only the changed ones are edited, without a history scan or a fetch
+    if volatileStates.statusMessageIDs:
+        try:
+            await publishStatusPages(pages, volatileStates.statusMessageIDs, volatileStates.statusPagesCache)
+            volatileStates.statusMessageCache = desiredContent
+            return
+        except discord.NotFound:
+            logging.info("[updateStatusMessage] A status page is gone, looking for the board...")
 
-    else:
-        targetMessage = await firmStates.channel.fetch_message(existingMessageId)
-        await targetMessage.edit(content=desiredContent)
-        logging.debug("[updateStatusMessage] Message updated!")
+    # we don't know what the found messages say, so every page gets rewritten
+    await publishStatusPages(pages, await findStatusMessages(len(pages)), [])
+    volatileStates.statusMessageCache = desiredContent
 
 
 
@@ -143,9 +197,9 @@ async def status(interaction: discord.Interaction, status_command: str, reason:
         if listLobbies.is_running(): listLobbies.stop()
 
         if reason:
-            firmStates.statusMessageText = ioRead(ioScopes.md, f"status_{firmStates.backendStatus}_with_reason.md").replace("!REASON", reason)
+            firmStates.statusMessageText = renderTemplate(f"status_{firmStates.backendStatus}_with_reason.md", {"!REASON": reason})
         else:
-            firmStates.statusMessageText = ioRead(ioScopes.md, f"status_{firmStates.backendStatus}.md")
+            firmStates.statusMessageText = renderTemplate(f"status_{firmStates.backendStatus}.md")
 
         await statusMessageHandler(firmStates.statusMessageText)
         logging.debug("[status] Stopped lobby listing routine")
@@ -363,7 +417,8 @@ async def replies_error(interaction: discord.Interaction, error):
 
 reset_choices = [
     app_commands.Choice(name="partial", value="partial"),
-    app_commands.Choice(name="llm", value="llm")
+    app_commands.Choice(name="llm", value="llm"),
+    app_commands.Choice(name="config", value="config")
     # app_commands.Choice(name="full", value="full")
 ]
 @commandTree.command(name="reset", description="Start from a clean slate", guild=None)
@@ -385,6 +440,11 @@ async def reset(interaction: discord.Interaction, reset_command: str):
             llmStates.reset()
             await interaction.response.send_message(ephemeral=True, content=f"LLM states reset!")
 
+        case "config":
+            configReload(force=True)
+            forceListingRebuild()
+            await interaction.response.send_message(ephemeral=True, content=f"Config reloaded!")
+
         # case "full":
         #     volatileStates.reset()
         #     firmStates.reset()
@@ -471,6 +531,51 @@ if ioRead(ioScopes.config, "experimentalFeatures"):
         app_commands.Choice(name="refresh_entries_for_llm", value="resetTools")
     ]
 
+    async def resolveUserName(userID): # every user is only looked up once, and the client's own cache is tried first
+        if int(userID) == 0:
+            return "Anonymous"
+        if userID in volatileStates.userNameCache:
+            return volatileStates.userNameCache[userID]
+
+        user = client.get_user(int(userID))
+        if user is None:
+            try:
+                user = await client.fetch_user(int(userID))
+            except discord.NotFound:
+                user = f"Unknown user ({userID})"
+            except discord.HTTPException as e: # rate limits, outages; not remembered, so the next export tries again
+                logging.warning(f"[resolveUserName] Couldn't look up {userID}: {e}")
+                return f"Unknown user ({userID})"
+
+        volatileStates.userNameCache[userID] = str(user)
+        logging.debug(f"[resolveUserName] {userID} is `{user}`")
+        return str(user)
+
+    async def exportEdits(entryName = None, pageSize = 200): # writes the history out a page at a time instead of building it in memory
+        exportFile = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        afterEditID = 0
+        editCount = 0
+
+        while True:
+            page = await runDB(getEditsPage, entryName, afterEditID, pageSize)
+
+            # the page's new editors are looked up all at once before it's written
+            pageEditors = list({edit[2] for edit in page})
+            editorNames = dict(zip(pageEditors, await asyncio.gather(*(resolveUserName(editorID) for editorID in pageEditors))))
+
+            for editID, editEntryName, editorID, date, diff in page:
+                separator = "\n\n====\n\n" if editCount else ""
+                exportFile.write(f"{separator}`{editEntryName}` - `{editorNames[editorID]}` at <t:{date}:f>:\n{diff}".encode())
+                editCount += 1
+
+            if len(page) < pageSize:
+                break
+            afterEditID = page[-1][0]
+
+        logging.debug(f"[exportEdits] Exported {editCount} edits")
+        exportFile.seek(0)
+        return discord.File(exportFile, filename="edits.txt")
+
     @commandTree.command(name="databank", description="Bring forth knowledge and lucidity to our AI overlords", guild=None)
     @app_commands.checks.has_role("Databank Editor")
     @app_commands.choices(action=db_action_choices)
@@ -478,24 +583,24 @@ if ioRead(ioScopes.config, "experimentalFeatures"):
 
         match action:
             case "getEntries":
-                entries = getEntries()
+                entryNames = await runDB(getEntryNames)
                 response = "Entry titles currently in the databank:\n\n"
 
-                for entry in entries:
-                    response += f"- {entry["name"]}\n"
+                for entryName in entryNames:
+                    response += f"- {entryName}\n"
 
                 responseFile = discord.File(io.BytesIO(response.encode()), filename="entries.txt")
                 await interaction.response.send_message(ephemeral=True, content="Here you go:", file=responseFile)
 
             case "getEntry":
-                await interaction.response.send_message(ephemeral=True, content=str(getEntryContent(entry)))
+                await interaction.response.send_message(ephemeral=True, content=str(await runDB(getEntryContent, entry)))
 
             case "addEntry":
                 if entry == None or entry_contents == None:
                     await interaction.response.send_message(ephemeral=True, content="This operation requires the `entry` and the `entry_contents` arguments.")
 
                 try:
-                    addEntry(entryName = entry, entryText = entry_contents)
+                    await runDB(addEntry, entryName = entry, entryText = entry_contents)
                     await interaction.response.send_message(ephemeral=True, content="Done!")
                 except ValueError:
                     await interaction.response.send_message(ephemeral=True, content="Entry already exists.")
@@ -505,32 +610,19 @@ if ioRead(ioScopes.config, "experimentalFeatures"):
                     await interaction.response.send_message(ephemeral=True, content="This operation requires the `entry` and the `entry_contents` arguments.")
 
                 try:
-                    editEntry(entryName = entry, newText = entry_contents, editorID = interaction.user.id)
+                    await runDB(editEntry, entryName = entry, newText = entry_contents, editorID = interaction.user.id)
                     await interaction.response.send_message(ephemeral=True, content="Done!")
                 except Exception as e:
                     await interaction.response.send_message(ephemeral=True, content=f"Failed with \n`{e}` \n:(")
 
             case "getEdits":
-                if entry:
-                    edits = getEdits(entry)
-                else:
-                    edits = getEdits()
-
-                editsFormatted = ""
-
-                logging.debug(f"[databank, getEdits] Edits list is `{str(edits[:30])}...`")
-
-                for edit in edits:
-                    if edit[1] == 0:
-                        editorName = "Anonymous"
-                    else:
-                        editorName = str(await client.fetch_user(edit[1]))
-                        logging.debug(f"[databank, getEdits] Editor name is `{editorName}`")
-
-                    editsFormatted += (f"`{edit[0]}` - `{editorName}` at <t:{edit[2]}:f>:\n{edit[3]}\n\n====\n\n")
-
-                editsFile = discord.File(io.BytesIO(editsFormatted.removesuffix("\n\n====\n\n").encode()), filename="edits.txt")
-                await interaction.response.send_message(ephemeral=True, content="Here you go:", file=editsFile)
+                await interaction.response.defer(ephemeral=True, thinking=True) # a long history can take a while to export
+                try:
+                    editsFile = await exportEdits(entry)
+                    await interaction.followup.send(ephemeral=True, content="Here you go:", file=editsFile)
+                except Exception as e: # the response is already deferred, so the error has to go through the followup
+                    logging.error(f"[databank] Exporting the edits failed with `{e}`")
+                    await interaction.followup.send(ephemeral=True, content=f"Failed with \n`{e}` \n:(")
 
             case "removeEntry" | "restoreEntry":
                 if entry == None:
@@ -538,11 +630,13 @@ if ioRead(ioScopes.config, "experimentalFeatures"):
 
                 if action == "removeEntry": operation = Visibility.DELETE
                 else: operation = Visibility.RESTORE
-                changeEntryVisibility(entry, operation)
+                await runDB(changeEntryVisibility, entry, operation)
                 await interaction.response.send_message(ephemeral=True, content="Done!")
 
-            case "resetTools":
-                llmStates.tools_reset()
+            case "resetTools": # the names are kept up to date on their own, this is for changes made outside the bot (e.g. databank_bulk.py)
+                await runDB(reloadEntryNames)
+                entryContentCache.clear()
+                await runDB(getEntryNames)
                 await interaction.response.send_message(ephemeral=True, content="Done!")
 
 
@@ -555,9 +649,17 @@ if ioRead(ioScopes.config, "experimentalFeatures"):
 
 
 
+def forceListingRebuild(): # the listing depends on config values, so it has to be rendered from scratch after a reload
+    firmStates.configRefresh()
+    volatileStates.lobbyBlockCache.clear()
+    volatileStates.hashAPILobby = "None"
+
 @tasks.loop(seconds=int(ioRead(ioScopes.config, "apiPollRate")))
 async def listLobbies():
-    statusMessage = composeStatus()
+    if configReload(): # a stat() per poll is all it takes to pick up config edits
+        forceListingRebuild()
+
+    statusMessage = await composeStatus()
     if statusMessage != "nothingToDo" and firmStates.backendStatus == "online":
         logging.debug("[Holocorp Primary Loop] Got a new status message, posting...")
         try:
@@ -580,13 +682,41 @@ async def on_ready():
     if firmStates.backendStatus == "online" and listLobbies.is_running() == False:
         listLobbies.start()
     else:
-        firmStates.statusMessageText = ioRead(ioScopes.md, "status_standby.md")
+        firmStates.statusMessageText = renderTemplate("status_standby.md")
         await statusMessageHandler(firmStates.statusMessageText)
     logging.info(f"[onReady] Done")
 
 
 
 
+async def streamLLMReply(message, llmPrompt): # reply right away, then fill the reply in as the LLM writes it
+    replyMessage = await message.reply("-# Thinking...")
+    editInterval = float(ioRead(ioScopes.config, "llmStreamEditInterval")) # keeps us well under Discord's edit rate limit
+    lastEditTime = time.monotonic()
+
+    streamingEdits = True
+
+    async def showPartialReply(partialReply):
+        nonlocal lastEditTime, streamingEdits
+        if not streamingEdits or time.monotonic() - lastEditTime < editInterval:
+            return
+        lastEditTime = time.monotonic()
+        try:
+            await replyMessage.edit(content=partialReply[:2000])
+        except discord.HTTPException as e: # e.g. the placeholder got deleted; the turn itself carries on, only the final edit is tried
+            logging.warning(f"[streamLLMReply] Partial edit failed with `{e}`, not streaming the rest of this reply")
+            streamingEdits = False
+
+    finalReply = await llmFetchResponse(llmPrompt, message.author, message.channel.id, showPartialReply)
+    try:
+        await replyMessage.edit(content=(finalReply or "-# No reply.")[:2000])
+    except discord.HTTPException as e:
+        logging.warning(f"[streamLLMReply] Final edit failed with `{e}`, replying with a new message instead")
+        await message.reply((finalReply or "-# No reply.")[:2000])
+
+
+
+
 @client.event
 async def on_message(message):
     logging.debug("[onMessage] Triggered")
@@ -621,9 +751,16 @@ async def on_message(message):
         await message.reply(replyCandidate.replace("!TARGETMESSAGE", targetMessage), mention_author=True)
 
     elif client.user in message.mentions and volatileStates.pingReplyType == "smart":
+        llmPrompt = str(message.content).replace(f"<@{client.user.id}>", "").lstrip()
+
+        if ioRead(ioScopes.config, "llmStreamReplies"):
+            logging.debug(f"[onMessage] Streaming the LLM's reply to \"{message.content}\"...")
+            await streamLLMReply(message, llmPrompt)
+            return
+
         async with message.channel.typing():
             logging.debug(f"[onMessage] Passing \"{message.content}\" to the LLM...")
-            await message.reply(llmFetchResponse(str(message.content).replace(f"<@{client.user.id}>", "").lstrip(), message.author))
+            await message.reply(await llmFetchResponse(llmPrompt, message.author, message.channel.id))
             return
 
 client.run(ioRead(ioScopes.secret, "credentials.txt"))
@@ -1,9 +1,11 @@
 # Guess from the file name what this is.
 from distutils.util import strtobool
+from types import MappingProxyType
 from pathlib import Path
 from enum import Enum
 import logging
 import json
+import os
 
 class ioScopes(Enum):
     replies = "./external/message_templates/ping_reply_list.md"
@@ -12,6 +14,7 @@ class ioScopes(Enum):
     md = "./external/message_templates/"
     llm = "./external/llm_resources/"
     secret = "./external/secrets/"
+    state = "./external/state/"
 
 class configInitial():
     def __init__(self):
@@ -25,6 +28,7 @@ class configInitial():
         self.emojiDebugFlagID = "None"
         self.showVitaWarning = True
         self.apiPollRate = 30
+        self.apiTimeout = 10
         self.apiLobbiesURL = "http://svo.agracingfoundation.org/medius_db/api/GetLobbyListing"
         self.apiPlayersURL = "http://svo.agracingfoundation.org/medius_db/api/GetPlayerCount"
         self.trackgenDroppedTrackResetCount = 16
@@ -35,9 +39,24 @@ class configInitial():
         self.platformLabelPS3 = "(PS3)"
         self.platformLabelVita = "(Vita)"
         self.platformLabelRPCS3 = "(RPCS3)"
-        self.llmMaxUserMessageCount = 50
+        self.llmContextTokenBudget = 4000
+        self.llmSessionScope = "channel"
+        self.llmMaxSessions = 64
+        self.llmSessionIdleTTL = 3600
+        self.llmResponseCacheSize = 256
+        self.llmResponseCacheTTL = 3600
+        self.llmDatabankEnumLimit = 50
+        self.llmDatabankSearchResults = 5
+        self.llmDatabankPassageResults = 3
+        self.llmTimeout = 30
+        self.llmMaxToolRounds = 3
+        self.llmStreamReplies = False
+        self.llmStreamEditInterval = 1.5
         self.dbSchemaPath = "./external/databank/databank_schema.sql"
         self.dbFilePath = "./external/databank/databank.db"
+        self.dbWorkerThreads = 2
+        self.dbSnapshotInterval = 16
+        self.dbEntryCacheBytes = 4194304
         self.experimentalFeatures = False
         self.loggingLevel = "Info"
 
@@ -49,31 +68,121 @@ def configCreate():
     logging.critical("[configCreate] New config file created! Please populate it and restart.")
     exit()
 
+class configSnapshot():
+    def __init__(self):
+        self.values = MappingProxyType({}) # read-only, replaced as a whole on reload so readers never see a half-loaded config
+        self.fileID = None # (inode, mtime) of the file the values were loaded from
+
+configSnapshotInstance = configSnapshot()
+
+def configValidate(fileAsObject: dict) -> dict:
+    """
+    Check the config file's values against the types of `configInitial` and coerce them where it's unambiguous.
+    Missing or invalid values are replaced with their defaults; keys that aren't in `configInitial` are passed through as-is.
+
+    Args:
+        fileAsObject (dict): The parsed config file.
+
+    Returns:
+        dict: The validated config.
+    """
+    validatedConfig = dict(fileAsObject)
+
+    for key, defaultValue in configInitialInstance.__dict__.items():
+        if key not in fileAsObject:
+            logging.warning(f"[configValidate] Value `{key}` not in file! Loaded the default value.")
+            validatedConfig[key] = defaultValue
+            continue
+
+        value = fileAsObject[key]
+        try:
+            if type(defaultValue) == bool and type(value) != bool:
+                value = bool(strtobool(str(value)))
+            elif type(defaultValue) == int and type(value) != int:
+                if type(value) == bool: raise ValueError("booleans aren't numbers")
+                value = int(value)
+            elif type(defaultValue) == float and type(value) != float:
+                if type(value) == bool: raise ValueError("booleans aren't numbers")
+                value = float(value)
+            elif type(defaultValue) == str and type(value) != str:
+                if type(value) not in (int, float): raise ValueError("only numbers can be used as strings")
+                value = str(value)
+        except (ValueError, TypeError) as e:
+            logging.error(f"[configValidate] Value `{key}` = `{value}` isn't a valid {type(defaultValue).__name__} ({e}), loaded the default value.")
+            value = defaultValue
+
+        validatedConfig[key] = value
+
+    return validatedConfig
+
+def configReload(force: bool = False) -> bool:
+    """
+    Reload the config snapshot used by `ioRead(ioScopes.config, ...)`, but only if the file has been replaced or modified since the last load.
+    The new snapshot is swapped in whole, and a file that fails to parse leaves the current snapshot in place.
+
+    Args:
+        force (bool): Reload even if the file looks unchanged.
+
+    Returns:
+        bool: True if a new snapshot has been loaded.
+    """
+    try:
+        fileStat = os.stat(ioScopes.config.value)
+    except FileNotFoundError:
+        logging.warning("[configReload] Config file not found, making one now...")
+        configCreate()
+        return False
+
+    fileID = (fileStat.st_ino, fileStat.st_mtime_ns)
+    if fileID == configSnapshotInstance.fileID and not force:
+        return False
+
+    try:
+        with open(ioScopes.config.value, "r") as file:
+            fileAsObject = json.load(file)
+    except json.JSONDecodeError as e:
+        if configSnapshotInstance.fileID is None:
+            logging.error("[configReload] Unable to parse the config JSON")
+            raise e
+        logging.error(f"[configReload] Unable to parse the config JSON ({e}), keeping the previous config")
+        return False
+
+    configSnapshotInstance.values = MappingProxyType(configValidate(fileAsObject))
+    configSnapshotInstance.fileID = fileID
+    logging.info("[configReload] Config loaded")
+    return True
+
 # confirm that each ioScopes entry is either a directory or a file
 for entry in ioScopes:
     if not Path(entry.value).is_dir() and not Path(entry.value).is_file():
         logging.warning(f"[io_handler Setup] `{entry.value}` (`{entry.name}`) doesn't exist!")
         if entry.name == "config": 
             configCreate()
+        elif entry.name == "state": # nothing in there is hand-written, so there's no need to bother anyone
+            Path(entry.value).mkdir(parents=True)
+            logging.info(f"[io_handler Setup] Created `{entry.value}`")
         else:
             raise SystemExit(f"[io_handler] Please create `{entry.value}` and restart.")
 
+configReload()
+
 def ioRead(scope: ioScopes, target: str = None):
     """ 
     Fetch data from an external file specified by the `scope`.
 
     This function behaves differently based on the `scope` passed:
         - ioScopes.config: 
-            Reads ioScopes.config.value as a JSON file and returns the requested key value (`target`) in its most appropriate format (str | int | bool).
+            Returns the requested key value (`target`) from the in-memory config snapshot in its most appropriate format (str | int | bool).
+            The snapshot is loaded from ioScopes.config.value on startup and refreshed by `configReload`, so lookups never touch the disk.
             - `target` value is required and must be an existing key within the ioScopes.config.value JSON.
-            - If `target` value isn't a valid key within ioScopes.config.value JSON, the function will attempt to load the key's default value.
+            - If `target` value isn't a valid key within ioScopes.config.value JSON, the key's default value is returned.
             - If `target` value isn't in the initial configuration dictionary, the function will raise an exception.
 
         - ioScopes.replies: 
             Reads ioScopes.replies.value as a string, splits the contents (separator is `|||`) and returns the resulting dict. 
             - `target` argument is ignored.
 
-        - ioScopes.md, ioScopes.llm, ioScopes.secret: 
+        - ioScopes.md, ioScopes.llm, ioScopes.secret, ioScopes.state: 
             Reads `target` file at `ioScopes.*.value`:
             - Returns file contents as a dictionary (if file format is JSON);
             - Returns file contents as a string (if file format is anything besides JSON).
@@ -94,27 +203,10 @@ def ioRead(scope: ioScopes, target: str = None):
     match scope.name:
         case "config":
             try:
-                with open(scope.value, "r") as file:
-                    fileAsObject = json.load(file)
-                return fileAsObject[target]
-
-            except FileNotFoundError:
-                logging.warning("[ioRead] Config file not found, making one now...")
-                configCreate()
-                return
-
-            except KeyError:
-                try:
-                    returnValue = getattr(configInitialInstance, target)
-                    logging.warning(f"[ioRead] Value `{target}` not in file! Loaded the default value.")
-                    return returnValue
-                except AttributeError as e:
-                    logging.error(f"[ioRead] Value `{target}` not in file or initial config!")
-                    raise e
-
-            except Exception as e:
-                logging.error("[configPull] No such variable in config or unable to parse JSON")
-                raise e
+                return configSnapshotInstance.values[target]
+            except KeyError as e:
+                logging.error(f"[ioRead] Value `{target}` not in file or initial config!")
+                raise AttributeError(f"'configInitial' object has no attribute '{target}'") from e
 
 
         case "replies":
@@ -130,7 +222,7 @@ def ioRead(scope: ioScopes, target: str = None):
                 raise e
 
 
-        case "md" | "llm" | "secret":
+        case "md" | "llm" | "secret" | "state":
             try:
                 with open(f"{scope.value}{target}", "r") as file:
                     return json.load(file) if ".json" in target else file.read()
@@ -140,4 +232,33 @@ def ioRead(scope: ioScopes, target: str = None):
 
         
         case _:
-            logging.warning(f"[ioRead] Unknown scope: {scope}")
\ No newline at end of file
+            logging.warning(f"[ioRead] Unknown scope: {scope}")
+
+
+def ioWrite(scope: ioScopes, target: str, data):
+    """
+    Persist data the bot generates at runtime, so that it survives restarts.
+    The file is written next to its destination first and then moved in place, so a crash mid-write never leaves a truncated file.
+
+    Args:
+        scope (ioScopes): Specifies the directory. Only ioScopes.state is writable.
+        target (str): The full file name. Data is stored as JSON if the name ends with `.json` and as a string otherwise.
+        data (str | dict | list): The data to write.
+
+    Returns:
+        None.
+
+    Raises:
+        ValueError: if `scope` isn't writable.
+    """
+    if scope.name != "state":
+        logging.error(f"[ioWrite] Refusing to write into the `{scope.name}` scope.")
+        raise ValueError(f"[ioWrite] The '{scope.name}' scope is read-only.")
+
+    temporaryPath = f"{scope.value}{target}.tmp"
+    with open(temporaryPath, "w", encoding="utf-8") as file:
+        if ".json" in target:
+            json.dump(data, file, ensure_ascii=False, indent=4)
+        else:
+            file.write(data)
+    os.replace(temporaryPath, f"{scope.value}{target}")
@@ -0,0 +1,74 @@
+# Answers (and tool results) the LLM has already worked out, kept until what they were based on changes.
+from collections import OrderedDict
+import logging
+import time
+import re
+
+def normalizeQuestion(question: str) -> str:
+    """
+    Reduce a question to a cache key, so trivial differences in case, punctuation and spacing still hit the same entry.
+
+    Args:
+        question (str): The question, with the bot mention stripped.
+
+    Returns:
+        str: The normalized question.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+class llmDependencyCache():
+    def __init__(self, maxEntries: int, ttl: int, versionOf):
+        self.maxEntries = maxEntries
+        self.ttl = ttl # seconds
+        self.versionOf = versionOf # dependency name -> its current version
+        self.entries = OrderedDict() # key -> (value, ((dependency, version), ...), time stored), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return a cached value, as long as it hasn't expired and none of its dependencies have changed since it was stored.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        cachedEntry = self.entries.get(key)
+        if cachedEntry is None:
+            self.misses += 1
+            return None
+
+        value, dependencies, storedAt = cachedEntry
+        if time.monotonic() - storedAt > self.ttl or any(self.versionOf(dependency) != version for dependency, version in dependencies):
+            del self.entries[key]
+            self.misses += 1
+            logging.debug(f"[llmDependencyCache] `{key}` is stale, dropped")
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, dependencies: dict):
+        """
+        Store a value along with the versions of everything it was derived from.
+
+        Args:
+            key: The cache key.
+            value: The value to cache.
+            dependencies (dict): Dependency names mapped to their versions at the time the value was worked out.
+
+        Returns:
+            None.
+        """
+        self.entries[key] = (value, tuple(dependencies.items()), time.monotonic())
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+
+    def __repr__(self):
+        return f"llmDependencyCache({len(self.entries)}/{self.maxEntries} entries, {self.hits} hits, {self.misses} misses)"
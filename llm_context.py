@@ -0,0 +1,140 @@
+# The LLM's conversation memory: a fixed prefix plus as many recent turns as fit in a token budget.
+from collections import OrderedDict
+from collections import deque
+import hashlib
+import logging
+import json
+import time
+
+def estimateTokens(message: dict) -> int:
+    """
+    Roughly estimate how many prompt tokens a message costs, without pulling in a tokenizer.
+    English averages about four characters per token; every message also carries a few tokens of overhead.
+
+    Args:
+        message (dict): A chat message, as sent to the API.
+
+    Returns:
+        int: The estimated token count.
+    """
+    characterCount = len(message.get("content") or "")
+    for toolCall in message.get("tool_calls") or []:
+        characterCount += len(toolCall["function"]["name"]) + len(toolCall["function"]["arguments"])
+
+    return characterCount // 4 + 4
+
+
+class llmPromptPrefix():
+    def __init__(self, permanentMessages: list):
+        # serialized once, and the messages are rebuilt from that so nothing else holds a reference that could change them later;
+        # every request starts with the exact same messages, which is what the provider's prompt cache matches on
+        self.serialized = json.dumps(list(permanentMessages), ensure_ascii=False, separators=(",", ":"))
+        self.messages = tuple(json.loads(self.serialized))
+        self.digest = hashlib.blake2b(self.serialized.encode(), digest_size=8).hexdigest()
+        self.tokenEstimate = sum(estimateTokens(message) for message in self.messages)
+
+        logging.info(f"[llmPromptPrefix] Prompt prefix {self.digest} is {len(self.messages)} messages, ~{self.tokenEstimate} tokens")
+        if self.tokenEstimate < 1024:
+            logging.info("[llmPromptPrefix] The prompt prefix is likely too short to be cached by the provider (1024 tokens minimum)")
+
+    def __repr__(self):
+        return f"llmPromptPrefix({self.digest}, {len(self.messages)} messages, ~{self.tokenEstimate} tokens)"
+
+
+class llmContextWindow():
+    def __init__(self, prefix: llmPromptPrefix, tokenBudget: int):
+        self.prefix = prefix # system message and examples, never evicted; shared between sessions, not copied
+        self.tokenBudget = tokenBudget # applies to the turns only, the permanent messages are paid for either way
+        self.turns = deque() # (messages, token estimate) per turn, oldest first
+        self.turnTokens = 0
+        self.lastUsed = time.monotonic()
+
+    def addTurn(self, turnMessages: list):
+        """
+        Append a finished turn (the user's message, any tool calls and their results, and the reply), then evict the oldest turns until the budget fits.
+        Turns are evicted whole, so a tool result never outlives the tool call it answers. The newest turn is always kept.
+
+        Args:
+            turnMessages (list): The turn's messages, in order.
+
+        Returns:
+            None.
+        """
+        turnTokens = sum(estimateTokens(message) for message in turnMessages)
+        self.turns.append((tuple(turnMessages), turnTokens))
+        self.turnTokens += turnTokens
+
+        evictedTurns = 0
+        while self.turnTokens > self.tokenBudget and len(self.turns) > 1:
+            _, evictedTokens = self.turns.popleft()
+            self.turnTokens -= evictedTokens
+            evictedTurns += 1
+
+        if evictedTurns:
+            logging.debug(f"[addTurn] Evicted {evictedTurns} turns, {len(self.turns)} turns ({self.turnTokens} tokens) left")
+
+    def messages(self) -> list:
+        """
+        Return every message in the window, ready to be sent to the API.
+
+        Args:
+            None.
+
+        Returns:
+            list: The prefix's messages followed by the kept turns' messages, in order.
+        """
+        contextMessages = list(self.prefix.messages)
+        for turnMessages, _ in self.turns:
+            contextMessages.extend(turnMessages)
+        return contextMessages
+
+    def __repr__(self):
+        return f"llmContextWindow({len(self.turns)} turns, ~{self.turnTokens}/{self.tokenBudget} tokens, {self.messages()})"
+
+
+class llmSessionStore():
+    def __init__(self, permanentMessages: list, tokenBudget: int, maxSessions: int, idleTTL: int):
+        self.prefix = llmPromptPrefix(permanentMessages)
+        self.tokenBudget = tokenBudget # per session
+        self.maxSessions = maxSessions
+        self.idleTTL = idleTTL # seconds
+        self.sessions = OrderedDict() # session key -> llmContextWindow, least recently used first
+
+    def getSession(self, sessionKey) -> llmContextWindow:
+        """
+        Return the conversation window for `sessionKey`, starting a new one if there isn't one.
+        Sessions that have been idle for longer than `idleTTL` are dropped first, and the least recently used session is dropped once there are more than `maxSessions`.
+
+        Args:
+            sessionKey: Anything hashable that identifies the conversation, e.g. a channel ID.
+
+        Returns:
+            llmContextWindow: The session's window.
+        """
+        now = time.monotonic()
+
+        # sessions are kept in order of use, so the idle ones are all at the front
+        while self.sessions:
+            oldestKey, oldestSession = next(iter(self.sessions.items()))
+            if now - oldestSession.lastUsed < self.idleTTL:
+                break
+            del self.sessions[oldestKey]
+            logging.debug(f"[getSession] Session {oldestKey} expired")
+
+        session = self.sessions.get(sessionKey)
+        if session is None:
+            session = llmContextWindow(self.prefix, self.tokenBudget)
+            self.sessions[sessionKey] = session
+            logging.debug(f"[getSession] New session {sessionKey}")
+
+            if len(self.sessions) > self.maxSessions:
+                evictedKey, _ = self.sessions.popitem(last=False)
+                logging.debug(f"[getSession] Too many sessions, dropped {evictedKey}")
+        else:
+            self.sessions.move_to_end(sessionKey)
+
+        session.lastUsed = now
+        return session
+
+    def __repr__(self):
+        return f"llmSessionStore({len(self.sessions)}/{self.maxSessions} sessions, {dict(self.sessions)})"
@@ -2,25 +2,32 @@
 from xml_parser import fetchPlayerCount
 from xml_parser import fetchLobbyList
 
+from template_handler import renderTemplate
+
 from states import volatileStateSet
 from states import firmStateSet
 
-from io_handler import ioScopes
-from io_handler import ioRead
-
+import asyncio
 import logging
 import string
+import re
 
 volatileStates = volatileStateSet()
 firmStates = firmStateSet()
 
-def composeStatus():
+statusPageLimit = 2000 # Discord's message length limit
+sectionPattern = re.compile(r"(?=\nLobby listing \()") # every lobby listing section starts a new page
+
+async def composeStatus():
 
-    fetchedLobbyList = fetchLobbyList()
+    # both endpoints are independent, so there's no reason to wait for one before asking for the other
+    fetchedLobbyList, (playerCount, playerCountIsSame) = await asyncio.gather(fetchLobbyList(), fetchPlayerCount())
 
-    if "failureApiFault" in fetchedLobbyList:
-        firmStates.statusMessageText = ioRead(ioScopes.md, "status_failure.md")
+    if "failureApiFault" in fetchedLobbyList or playerCount == "failureApiFault":
+        firmStates.statusMessageText = renderTemplate("status_failure.md")
         logging.info("[composeStatus] Got a `failureApiFault`, setting status to `status_failure.md`")
+        volatileStates.hashAPILobby = "None"    # make sure the listing gets re-rendered once the API recovers,
+        volatileStates.hashAPIPlayers = "None"  # even if it recovers with the exact same data
         return "failure"
 
     if fetchedLobbyList != "nothingToDo":
@@ -29,14 +36,45 @@ def composeStatus():
     else:
         volatileStates.lobbyListingIsSame = True
 
-    playerCount, volatileStates.playerCountIsSame = fetchPlayerCount()
-
+    volatileStates.playerCountIsSame = playerCountIsSame
 
     if volatileStates.lobbyListingIsSame == True and volatileStates.playerCountIsSame == True:
         return "nothingToDo"
     else:
-        firmStates.statusMessageText = ioRead(ioScopes.md, "status_online.md")\
-        .replace("!PLAYERCOUNT", playerCount)\
-        .replace("!LOBBYLISTING", volatileStates.lobbyListing)\
-        .replace("!NOPLAYERS\n", "")
-        return "updated"
\ No newline at end of file
+        firmStates.statusMessageText = renderTemplate("status_online.md", {
+            "!PLAYERCOUNT": None if playerCount == "!NOPLAYERS" else playerCount, # no players, no line
+            "!LOBBYLISTING": volatileStates.lobbyListing
+        })
+        return "updated"
+
+def paginateStatus(statusText: str) -> list[str]:
+    """
+    Split a rendered status into pages that each fit in a single Discord message.
+    The header (everything before the first lobby listing) and every lobby listing section always start a page of their own,
+    so a change in one section never shifts the pages of another. Sections that don't fit are split between lobby blocks.
+
+    Args:
+        statusText (str): The rendered status message.
+
+    Returns:
+        list[str]: The pages, in the order they should appear in the channel.
+    """
+    pages = []
+
+    for section in sectionPattern.split(statusText):
+        currentPage = ""
+
+        for block in section.split("\n\n"):
+            if len(block) > statusPageLimit: # a single lobby this big shouldn't happen, but the page must still be postable
+                logging.warning(f"[paginateStatus] Block of {len(block)} characters doesn't fit in a page, truncating")
+                block = block[:statusPageLimit]
+
+            if currentPage and len(currentPage) + 2 + len(block) > statusPageLimit:
+                pages.append(currentPage)
+                currentPage = block
+            else:
+                currentPage = f"{currentPage}\n\n{block}" if currentPage else block
+
+        pages.append(currentPage)
+
+    return [page.strip("\n") for page in pages if page.strip()] # Discord refuses blank messages
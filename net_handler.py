@@ -0,0 +1,100 @@
+# Async HTTP plumbing for the API poller, so slow Thallium responses don't freeze the Discord event loop.
+from states import volatileStateSet
+
+from io_handler import ioScopes
+from io_handler import ioRead
+
+import aiohttp
+import asyncio
+import logging
+
+volatileStates = volatileStateSet()
+
+apiSession = None
+
+def getSession() -> aiohttp.ClientSession:
+    """
+    Return the shared keep-alive HTTP session, creating it on first use.
+    The session must be created from within a running event loop, which is why this isn't done on import.
+
+    Args:
+        None.
+
+    Returns:
+        aiohttp.ClientSession: The pooled session used for every API request.
+    """
+    global apiSession
+
+    if apiSession is None or apiSession.closed:
+        connector = aiohttp.TCPConnector(limit_per_host=4, keepalive_timeout=int(ioRead(ioScopes.config, "apiPollRate")) * 2)
+        apiSession = aiohttp.ClientSession(connector=connector) # the timeout is passed per request, so a config reload changes it
+        logging.debug("[getSession] New API session created")
+
+    return apiSession
+
+
+async def closeSession():
+    """
+    Close the shared HTTP session, if one exists. Intended to be called on bot shutdown.
+
+    Args, Returns, Raises:
+        None.
+    """
+    global apiSession
+
+    if apiSession is not None and not apiSession.closed:
+        await apiSession.close()
+        logging.debug("[closeSession] API session closed")
+    apiSession = None
+
+
+async def fetchEndpoint(url: str, conditional: bool = False) -> tuple[str, bytes | None]:
+    """
+    Fetch the raw body of an API endpoint without blocking the event loop.
+    Every request is bound by the `apiTimeout` config value, read on each call so a config reload applies right away; task cancellation is passed through untouched.
+
+    The `ETag` and `Last-Modified` validators of every response are kept in `volatileStates.apiValidators` (per URL).
+    When `conditional` is set and validators are known, they're sent back so the server can answer with a bodyless 304.
+    If the server doesn't send validators, every request is a full one and callers fall back to comparing hashes.
+
+    Args:
+        url (str): The endpoint to fetch.
+        conditional (bool): Whether a 304 is acceptable, i.e. the caller still has the result of the last full response.
+
+    Returns:
+        tuple[str, bytes | None]: A status and the response body:
+            - ("ok", bytes): A full response was received.
+            - ("notModified", None): The server confirmed that nothing changed since the last full response.
+            - ("failure", None): The request failed or timed out.
+
+    Raises:
+        asyncio.CancelledError: if the calling task is cancelled mid-request.
+    """
+    requestHeaders = {}
+    storedValidators = volatileStates.apiValidators.get(url, {})
+
+    if conditional:
+        if "ETag" in storedValidators:
+            requestHeaders["If-None-Match"] = storedValidators["ETag"]
+        if "Last-Modified" in storedValidators:
+            requestHeaders["If-Modified-Since"] = storedValidators["Last-Modified"]
+
+    try:
+        timeout = aiohttp.ClientTimeout(total=int(ioRead(ioScopes.config, "apiTimeout")))
+        async with getSession().get(url, headers=requestHeaders, timeout=timeout) as response:
+            if response.status == 304:
+                logging.debug(f"[fetchEndpoint] {url} not modified")
+                return "notModified", None
+
+            volatileStates.apiValidators[url] = {
+                header: response.headers[header] for header in ("ETag", "Last-Modified") if header in response.headers
+            }
+            return "ok", await response.read()
+
+    except asyncio.TimeoutError:
+        logging.warning(f"[fetchEndpoint] Request to {url} timed out")
+        return "failure", None
+
+    except aiohttp.ClientError as e:
+        logging.warning(f"[fetchEndpoint] Request to {url} failed with `{e}`")
+        return "failure", None
@@ -1,12 +1,20 @@
 from db_handler import getEntryContent
+from db_handler import searchEntries
+from db_handler import searchPassages
+from db_handler import runDB
+
+from llm_cache import normalizeQuestion
 
 from states import volatileStateSet
 from states import llmStateSet
+from states import llmDependencyVersion
 
 from io_handler import ioScopes
 from io_handler import ioRead
 
-from openai import OpenAI
+from openai import AsyncOpenAI
+import openai
+import asyncio
 import logging
 import json
 
@@ -17,7 +25,7 @@ except FileNotFoundError:
     apiKey = None
 
 if apiKey:
-    oai_client = OpenAI(api_key=apiKey)
+    oai_client = AsyncOpenAI(api_key=apiKey, max_retries=0) # a retry would stretch a ping past `llmTimeout`
 
 llmStates = llmStateSet()
 volatileStates = volatileStateSet()
@@ -37,84 +45,263 @@ if ioRead(ioScopes.config, "experimentalFeatures"):
 
         return entryContent
 
+    def databankSearch(query: str) -> str:
+        results = searchEntries(query, int(ioRead(ioScopes.config, "llmDatabankSearchResults")))
+
+        if not results:
+            return "No entries match. Pick NoRelevantEntries in databankLookup and admit it to the user."
+
+        return "\n\n".join(f"Entry `{result['name']}`: {result['snippet']}" for result in results)
+
+    def databankPassages(question: str) -> str:
+        results = searchPassages(question, int(ioRead(ioScopes.config, "llmDatabankPassageResults")))
+
+        if not results:
+            return "Nothing in the databank is relevant. Admit it to the user."
+
+        return "\n\n".join(f"From entry `{result['name']}`:\n{result['passage']}" for result in results)
+
 else:
-    def databankLookup():
+    def databankLookup(entry: str = None):
         return "Databank access is currently restricted."
 
-def llmFetchResponse(message: str, author: str):
-    
+    def databankSearch(query: str = None):
+        return "Databank access is currently restricted."
+
+    def databankPassages(question: str = None):
+        return "Databank access is currently restricted."
+
+async def runToolCall(functionName: str, functionArguments: str, dependencies: dict) -> str | None:
+    """
+    Run a tool the model asked for. Databank lookups are served from `llmStates.llmToolCache` while the entry stays unchanged.
+
+    Args:
+        functionName (str): The tool's name.
+        functionArguments (str): The tool's arguments, as the JSON string the model sent.
+        dependencies (dict): Collects what the result was derived from (see `llmDependencyVersion`), mapped to its version at the time.
+
+    Returns:
+        str | None: The tool's result, or None if the tool doesn't exist.
+    """
+    match functionName:
+        case "getPostedLobbyListing":
+            dependencies["!LOBBYLISTING"] = llmDependencyVersion("!LOBBYLISTING")
+            return getPostedLobbyListing()
+
+        case "databankLookup":
+            try:
+                entry = json.loads(functionArguments)['entry']
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logging.warning(f"[runToolCall] Bad arguments for {functionName}: {functionArguments}")
+                return "Invalid arguments, `entry` is required."
+            dependency = "!DATABANK" if entry == "NoRelevantEntries" else entry # a new entry might be the relevant one
+            dependencies[dependency] = llmDependencyVersion(dependency)
+
+            results = llmStates.llmToolCache.get(entry)
+            if results is None:
+                results = await runDB(databankLookup, entry) # sqlite is blocking
+                llmStates.llmToolCache.put(entry, results, {dependency: dependencies[dependency]})
+            return results
+
+        case "databankSearch" | "databankPassages":
+            argumentName = "query" if functionName == "databankSearch" else "question"
+            try:
+                query = json.loads(functionArguments)[argumentName]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logging.warning(f"[runToolCall] Bad arguments for {functionName}: {functionArguments}")
+                return f"Invalid arguments, `{argumentName}` is required."
+            dependencies["!DATABANK"] = llmDependencyVersion("!DATABANK") # any change can reorder the results
+
+            results = llmStates.llmToolCache.get((functionName, query))
+            if results is None:
+                searchFunction = databankSearch if functionName == "databankSearch" else databankPassages
+                results = await runDB(searchFunction, query)
+                llmStates.llmToolCache.put((functionName, query), results, {"!DATABANK": dependencies["!DATABANK"]})
+            return results
+
+        case _:
+            logging.warning(f"[runToolCall] Function {functionName} does not exist")
+            return None
+
+def recordPromptUsage(usage):
+    """
+    Log how much of a request's prompt the provider served from its prompt cache, and keep a running total in `llmStates`.
+
+    Args:
+        usage (openai.types.CompletionUsage | None): The request's usage report, if any.
+
+    Returns:
+        None.
+    """
+    if usage is None:
+        return
+
+    cachedTokens = 0
+    if usage.prompt_tokens_details and usage.prompt_tokens_details.cached_tokens:
+        cachedTokens = usage.prompt_tokens_details.cached_tokens
+
+    llmStates.llmPromptTokens += usage.prompt_tokens
+    llmStates.llmCachedPromptTokens += cachedTokens
+
+    requestHitRate = cachedTokens / usage.prompt_tokens * 100 if usage.prompt_tokens else 0
+    overallHitRate = llmStates.llmCachedPromptTokens / llmStates.llmPromptTokens * 100 if llmStates.llmPromptTokens else 0
+    logging.info(f"[recordPromptUsage] {cachedTokens}/{usage.prompt_tokens} prompt tokens cached ({requestHitRate:.0f}%), {overallHitRate:.0f}% overall")
+
+
+async def requestCompletion(messages: list, tools: list | None, timeout: int, onText = None) -> dict:
+    """
+    Request a single completion and return the model's message as a plain dict, ready to go back into the context.
+
+    Args:
+        messages (list): The messages to send.
+        tools (list | None): The tools the model may call, if any.
+        timeout (int): The request timeout, in seconds. When streaming, it applies to the wait for each chunk.
+        onText (callable): If set, the completion is streamed and this coroutine is awaited with the text received so far after every text chunk.
+
+    Returns:
+        dict: The assistant message, with `content` and/or `tool_calls`.
+
+    Raises:
+        openai.APIError: if the request fails or times out.
+    """
+    requestArguments = {"model": "gpt-4o-mini", "messages": messages, "timeout": timeout}
+    if tools:
+        requestArguments.update(tools=tools, tool_choice="auto")
+
+    if onText is None:
+        modelResponse = await oai_client.chat.completions.create(**requestArguments)
+        recordPromptUsage(modelResponse.usage)
+        return modelResponse.choices[0].message.model_dump(exclude_none=True)
+
+    responseStream = await oai_client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **requestArguments)
+    content = ""
+    toolCalls = {} # tool calls arrive in pieces, keyed by their index
+
+    async for chunk in responseStream:
+        if not chunk.choices: # the usage report comes last, in a chunk of its own
+            recordPromptUsage(chunk.usage)
+            continue
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            content += delta.content
+            await onText(content)
+
+        for toolCallDelta in delta.tool_calls or []:
+            toolCall = toolCalls.setdefault(toolCallDelta.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            if toolCallDelta.id:
+                toolCall["id"] = toolCallDelta.id
+            if toolCallDelta.function:
+                toolCall["function"]["name"] += toolCallDelta.function.name or ""
+                toolCall["function"]["arguments"] += toolCallDelta.function.arguments or ""
+
+    responseMessage = {"role": "assistant"}
+    if content:
+        responseMessage["content"] = content
+    if toolCalls:
+        responseMessage["tool_calls"] = [toolCalls[index] for index in sorted(toolCalls)]
+    return responseMessage
+
+
+async def llmFetchResponse(message: str, author: str, channelID: int = 0, onText = None) -> str:
+    """
+    Get the LLM's reply to a message, running the tool calls it asks for in between (concurrently, for up to `llmMaxToolRounds` rounds).
+    Requests go through the async client and DB lookups run in a worker thread, so the event loop (and every other ping) keeps going meanwhile.
+    The turn is built up locally and only added to the session's context window once it's complete, so concurrent turns can't interleave.
+    Tool-backed answers to the first question of a conversation are cached by question and served to anyone asking it again, until the entries
+    (or the listing) they were based on change.
+
+    Args:
+        message (str): The message, with the bot mention stripped.
+        author (str): The message's author.
+        channelID (int): The channel the message was sent in. Every channel (or every user in a channel, see `llmSessionScope`) gets a conversation of its own.
+        onText (callable): If set, replies are streamed and this coroutine is awaited with the reply's text so far as it arrives.
+            Text streamed before tool calls is superseded by the text of the reply that follows them.
+
+    Returns:
+        str: The reply to post.
+    """
     if not "oai_client" in globals():
         return "Sorry, LLM replies aren't available at this time. Please contact staff."
 
-    newMessage = {"role": "user", "content": f"{author}: {message}"}
-    llmStates.llmContext.append(newMessage)
+    llmTimeout = int(ioRead(ioScopes.config, "llmTimeout"))
+    llmMaxToolRounds = int(ioRead(ioScopes.config, "llmMaxToolRounds"))
+
+    if ioRead(ioScopes.config, "llmSessionScope") == "user":
+        llmContext = llmStates.llmSessions.getSession((channelID, str(author)))
+    else:
+        llmContext = llmStates.llmSessions.getSession(channelID)
+    questionKey = normalizeQuestion(message)
+    turnDependencies = {}
+
+    # cached answers don't depend on who asked or on any conversation (see below), so they're served in any session
+    cachedResponse = llmStates.llmResponseCache.get(questionKey)
+    if cachedResponse is not None:
+        logging.info(f"[llmFetchResponse] Answered [{questionKey[:30]}] from the response cache ({llmStates.llmResponseCache})")
+        llmContext.addTurn([{"role": "user", "content": f"{author}: {message}"}, {"role": "assistant", "content": cachedResponse}])
+        return cachedResponse
+
+    # the first question of a conversation is asked without the author's name, so its answer only depends on the question
+    # and on what the tools returned; that answer can go in the cache. Later questions get the name and the conversation so far
+    cacheable = not llmContext.turns
+    turnMessages = [{"role": "user", "content": message if cacheable else f"{author}: {message}"}]
+    # pinned now, so a turn that finishes elsewhere in the session meanwhile can't leak into a cacheable answer
+    contextMessages = list(llmContext.prefix.messages) if cacheable else None
 
     if len(message) > 30:
         logging.debug(f"[llmFetchResponse] New message is [{message[:30]}...]")
     else: # OCD
         logging.debug(f"[llmFetchResponse] New message is [{message}]")
 
-    modelResponse = oai_client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=llmStates.llmContext,
-        tools=llmStates.tools,
-        tool_choice="auto"
-    )
-
-    responseContent = modelResponse.choices[0].message 
-    llmStates.llmContext.append(responseContent)
-
-    logging.debug(f"[llmFetchResponse] Model response is {responseContent}")
-
-    tool_calls = responseContent.tool_calls
-
-    if tool_calls:
-        tool_call_id = tool_calls[0].id
-        tool_function_name = tool_calls[0].function.name
+    try:
+        tools = await llmStates.getTools()
 
-        skipToolRun = False
+        # every round either ends the turn with a reply or runs all of the tool calls it asked for at once;
+        # the last round doesn't offer tools, so a turn always ends with a reply
+        for toolRound in range(llmMaxToolRounds + 1):
+            responseContent = await requestCompletion(
+                (contextMessages or llmContext.messages()) + turnMessages,
+                tools if toolRound < llmMaxToolRounds else None,
+                llmTimeout,
+                onText
+            )
+            turnMessages.append(responseContent)
 
-        match tool_function_name:
-            case "getPostedLobbyListing":
-                results = getPostedLobbyListing()
+            logging.debug(f"[llmFetchResponse] Model response is {responseContent}")
 
-            case "databankLookup":
-                entry = json.loads(tool_calls[0].function.arguments)['entry']
-                results = databankLookup(entry)
+            tool_calls = responseContent.get("tool_calls")
+            finalResponse = responseContent.get("content")
 
-            case _:
-                logging.warning(f"[llmFetchResponse function run] Function {tool_function_name} does not exist")
-                skipToolRun = True
+            if not tool_calls:
+                break
 
-        if not skipToolRun:
-            llmStates.llmContext.append({
-                "role":"tool", 
-                "tool_call_id":tool_call_id, 
-                "name": tool_function_name, 
-                "content":results
-            })
+            logging.debug(f"[llmFetchResponse] Round {toolRound + 1}: running {len(tool_calls)} tool calls")
+            toolResults = await asyncio.gather(*(
+                runToolCall(tool_call["function"]["name"], tool_call["function"]["arguments"], turnDependencies) for tool_call in tool_calls
+            ))
 
-            modelResponseWithFunctionCall = oai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=llmStates.llmContext,
-            )
-            finalResponse = modelResponseWithFunctionCall.choices[0].message.content
+            # every call must be answered, or every request after this one would be refused
+            for tool_call, results in zip(tool_calls, toolResults):
+                turnMessages.append({
+                    "role":"tool",
+                    "tool_call_id":tool_call["id"],
+                    "name": tool_call["function"]["name"],
+                    "content":results if results is not None else "This function does not exist."
+                })
 
-    else: 
-        finalResponse = modelResponse.choices[0].message.content
+    except openai.APITimeoutError:
+        logging.warning(f"[llmFetchResponse] Request timed out after {llmTimeout}s, dropping the turn")
+        return "Sorry, that took too long. Please try again in a bit."
 
-    llmStates.llmContext.append({"role": "assistant", "content": finalResponse})
+    except openai.APIError as e:
+        logging.error(f"[llmFetchResponse] Request failed with `{e}`, dropping the turn")
+        return "Sorry, LLM replies aren't available at this time. Please contact staff."
 
-    if len(llmStates.llmContext) > llmStates.llmContextPermanentEntryCount + llmStates.llmMaxUserMessageCount:
-        logging.debug(f"[llmFetchResponse] Exceeded {llmStates.llmMaxUserMessageCount} user messages, popping the oldest...")
+    llmContext.addTurn(turnMessages)
 
-        for i in range (1,6):
-            llmStates.llmContext.pop(llmStates.llmContextPermanentEntryCount)
-            try:
-                role = llmStates.llmContext[llmStates.llmContextPermanentEntryCount]["role"]
-            except:
-                role = "assistant"
-            if role == "user":
-                break
+    # of those, only answers backed by a tool are cached; those are the lore/listing questions people keep asking, and they have
+    # something to be invalidated by (the revisions of the entries, or the listing, they were based on). Small talk is left to the model
+    if cacheable and turnDependencies and finalResponse:
+        llmStates.llmResponseCache.put(questionKey, finalResponse, turnDependencies)
 
-    return finalResponse
\ No newline at end of file
+    return finalResponse
@@ -2,6 +2,15 @@
 
 from io_handler import *
 
+from template_handler import renderTemplate
+
+from llm_context import llmSessionStore
+
+from llm_cache import llmDependencyCache
+
+import logging
+import json
+
 def singleton(cls): # singleton boilerplate
     instances = {}
 
@@ -21,11 +30,14 @@ class volatileStateSet:
         self._defaults = {
             "hashAPILobby": "None",
             "hashAPIPlayers": "None",
+            "apiValidators": {}, # ETag/Last-Modified of the last full response, by URL
             "appId": "None",  # TODO: test if appId has to be a volatileState
             "tourneyProgressByLobby": {}, # this dict will have lobby name as key, current race, last update and tourney finished flag
-            "tourneyProgressFunctionIsIdle": False, # parser states
+            "tourneyProgressFunctionIsIdle": False,
+            "lobbyBlockCache": {}, # rendered lobby blocks by lobby fingerprint, parser states
 
             "playerCountIsSame": False,
+            "playerCount": "None",
             "lobbyListingIsSame": False,
             "lobbyListing": "None", # message_composer states
 
@@ -35,23 +47,31 @@ class volatileStateSet:
             "pingReplyRiggedMessage": "None",
             "currentStatusAlreadyPosted": "None",
             "statusMessageCache": "None",
+            "statusMessageIDs": [], # one message per status page, remembered across restarts, see updateStatusMessage
+            "statusPagesCache": [],
+            "statusApiCallsSaved": 0,
+            "statusHistoryScans": 0,
+            "userNameCache": {}, # Discord user ID -> name, for the databank's edit history
             "pingReplyCache": [],
             "trackGeneratorCache": [], # entrypoint states
-
-            "dbEntriesList": None,
         }
         self.__dict__.update(self._defaults)
 
-        from db_handler import getEntries
-
-        entryList = []
-        entries = getEntries()
-        for entry in entries:
-            entryList.append(entry["name"])
+        try:
+            statusMessageState = ioRead(ioScopes.state, "status_message.json")
+        except FileNotFoundError:
+            statusMessageState = {}
+        except json.JSONDecodeError as e: # a truncated or hand-edited file just means the board gets looked up again
+            logging.warning(f"[volatileStateSet] status_message.json is unreadable ({e}), ignoring it")
+            statusMessageState = {}
+        if not isinstance(statusMessageState, dict):
+            logging.warning("[volatileStateSet] status_message.json isn't an object, ignoring it")
+            statusMessageState = {}
 
-        entryList.append("NoRelevantEntries")
-
-        self.dbEntriesList = entryList
+        if statusMessageState.get("channelID") == int(ioRead(ioScopes.config, "statusMessageChannelID")):
+            self.statusMessageIDs = statusMessageState.get("messageIDs", [])
+            if "messageID" in statusMessageState: # single-message board, from before pagination
+                self.statusMessageIDs = [statusMessageState["messageID"]]
 
 @singleton
 class firmStateSet:
@@ -60,6 +80,19 @@ class firmStateSet:
 
     def reset(self):
         self._defaults = {
+            "backendStatus": ioRead(ioScopes.config, "defaultBackendStatus"),
+            "statusMessageText": None,
+            "channel": "None", # entrypoint states
+
+            "dbFilePath": ioRead(ioScopes.config, "dbFilePath"),
+            "dbSchemaPath": ioRead(ioScopes.config, "dbSchemaPath") # databank states
+        }
+        self.__dict__.update(self._defaults)
+        self.configRefresh()
+        self.statusMessageText = renderTemplate(f"status_{self.backendStatus}.md")
+
+    def configRefresh(self): # copies of config values that are safe to swap at runtime; call it whenever configReload() loads a new config
+        self.__dict__.update({
             "urlListing": ioRead(ioScopes.config, "apiLobbiesURL"),
             "urlCount": ioRead(ioScopes.config, "apiPlayersURL"),
             "showVitaWarning": ioRead(ioScopes.config, "showVitaWarning"),
@@ -73,16 +106,19 @@ class firmStateSet:
             "platformLabelVita": ioRead(ioScopes.config, "platformLabelVita"),
             "platformLabelRPCS3": ioRead(ioScopes.config, "platformLabelRPCS3"), # parser states
 
-            "backendStatus": ioRead(ioScopes.config, "defaultBackendStatus"),
-            "statusMessageText": None,
-            "channel": "None",
-            "trackgenDroppedTrackResetCount": ioRead(ioScopes.config, "trackgenDroppedTrackResetCount"), # entrypoint states
+            "trackgenDroppedTrackResetCount": ioRead(ioScopes.config, "trackgenDroppedTrackResetCount") # entrypoint states
+        })
 
-            "dbFilePath": ioRead(ioScopes.config, "dbFilePath"),
-            "dbSchemaPath": ioRead(ioScopes.config, "dbSchemaPath") # databank states
-        }
-        self.__dict__.update(self._defaults)
-        self.statusMessageText = ioRead(ioScopes.md, f"status_{self.backendStatus}.md")
+def llmDependencyVersion(dependency: str): # what cached LLM replies and tool results are checked against
+    from db_handler import getEntryRevision
+
+    match dependency:
+        case "!LOBBYLISTING":
+            return hash(volatileStateSet().statusMessageCache) # str hashes are cached, so this is cheap
+        case "!DATABANK":
+            return getEntryRevision()
+        case _:
+            return getEntryRevision(dependency)
 
 @singleton
 class llmStateSet:
@@ -95,18 +131,66 @@ class llmStateSet:
         llmInitialContext.extend(exampleMessages["messages"])
 
         self._defaults = {
-            "llmContext": llmInitialContext,
-            "llmContextPermanentEntryCount": len(llmInitialContext),
-            # max message count is multiplied by two such that it looks at message pairs, not individual messages
-            "llmMaxUserMessageCount": int(ioRead(ioScopes.config, "llmMaxUserMessageCount")) * 2,
-            "tools": None
+            "llmSessions": llmSessionStore(
+                llmInitialContext,
+                int(ioRead(ioScopes.config, "llmContextTokenBudget")),
+                int(ioRead(ioScopes.config, "llmMaxSessions")),
+                int(ioRead(ioScopes.config, "llmSessionIdleTTL"))
+            ),
+            "llmResponseCache": llmDependencyCache(
+                int(ioRead(ioScopes.config, "llmResponseCacheSize")),
+                int(ioRead(ioScopes.config, "llmResponseCacheTTL")),
+                llmDependencyVersion
+            ),
+            "llmToolCache": llmDependencyCache(
+                int(ioRead(ioScopes.config, "llmResponseCacheSize")),
+                int(ioRead(ioScopes.config, "llmResponseCacheTTL")),
+                llmDependencyVersion
+            ),
+            "tools": None,
+            "toolsSerialized": None, # `tools` as JSON, to tell whether a rebuild actually changed anything
+            "toolsEntryNamesVersion": None, # the entry name list version `tools` was built from, see getTools
+            "llmPromptTokens": 0,
+            "llmCachedPromptTokens": 0 # prompt tokens the provider served from its prefix cache
         }
-        self.__dict__.update(self._defaults)
-        self.tools_reset()
+        self.__dict__.update(self._defaults) # the tools are built on first use, see getTools
     
+    async def getTools(self) -> list:
+        """
+        Get the tool schema for the LLM, rebuilding it only if the entry names it lists have changed since it was last built.
+        The rebuild reads the entry names from the databank, so it runs on a databank thread rather than the event loop.
+
+        Args:
+            None.
+
+        Returns:
+            list: The tools.
+        """
+        from db_handler import getEntryNamesVersion
+        from db_handler import runDB
+
+        if self.toolsEntryNamesVersion != getEntryNamesVersion():
+            await runDB(self.tools_reset)
+        return self.tools
+
     def tools_reset(self):
-        volatileStates = volatileStateSet()
-        self.tools = [
+        from db_handler import getEntryNamesVersion
+        from db_handler import getEntryNames
+
+        self.toolsEntryNamesVersion = getEntryNamesVersion() # read first, so a change made while building still triggers a rebuild
+        entryNames = getEntryNames()
+
+        entryParameter = {
+            "type": "string",
+            "description": "Specify the entry you want information about. Pick the most relevant entry name to the conversation.",
+        }
+        # listing every entry name costs prompt tokens on every request, so past a point the model has to find names with databankSearch
+        if len(entryNames) <= int(ioRead(ioScopes.config, "llmDatabankEnumLimit")):
+            entryParameter["enum"] = entryNames + ["NoRelevantEntries"]
+        else:
+            entryParameter["description"] = "The exact name of the entry you want information about, as returned by databankSearch."
+
+        tools = [
             {
                 "type": "function",
                 "function": {
@@ -121,19 +205,57 @@ class llmStateSet:
             {
                 "type": "function",
                 "function": {
-                    "name": "databankLookup",
-                    "description": "Look up information stored in the databank for lore-related questions. If there isn't a relevant entry in the databank, pick the respective NoRelevantEntries option and admit to user. THIS INFORMATION MUST ONLY BE USED AS REFERENCE. WRITE CREATIVE REPLIES INSTEAD OF RECITING THE ENTRY'S CONTENTS.",
+                    "name": "databankSearch",
+                    "description": "Search the databank for lore-related questions. Returns the names of the most relevant entries along with snippets of their text. Use databankLookup with one of the names to read the whole entry if the snippet isn't enough.",
                     "parameters": {
                         "type": "object",
                         "properties": {
-                            "entry": {
+                            "query": {
                                 "type": "string",
-                                "enum": volatileStates.dbEntriesList, # mandates you to refresh volatileStates first, FIXME
-                                "description": "Specify the entry you want information about. Pick the most relevant entry name to the conversation.",
+                                "description": "A few keywords describing what you're looking for.",
                             }
                         },
+                        "required": ["query"],
+                    },
+                }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "databankPassages",
+                    "description": "Get the few passages of the databank that are the most relevant to a specific lore question. Prefer this over databankLookup when only part of an entry is needed. THIS INFORMATION MUST ONLY BE USED AS REFERENCE.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "question": {
+                                "type": "string",
+                                "description": "The question, rephrased to stand on its own.",
+                            }
+                        },
+                        "required": ["question"],
+                    },
+                }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "databankLookup",
+                    "description": "Look up information stored in the databank for lore-related questions. If there isn't a relevant entry in the databank, pick the respective NoRelevantEntries option and admit to user. THIS INFORMATION MUST ONLY BE USED AS REFERENCE. WRITE CREATIVE REPLIES INSTEAD OF RECITING THE ENTRY'S CONTENTS.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "entry": entryParameter
+                        },
                         "required": ["entry"],
                     },
                 }
             },
-        ]
\ No newline at end of file
+        ]
+
+        # the same schema is kept (object and all) unless something in it really changed, e.g. past llmDatabankEnumLimit
+        # new entries don't show up in it at all; an unchanged schema keeps the provider's prompt cache warm
+        toolsSerialized = json.dumps(tools, sort_keys=True)
+        if toolsSerialized != self.toolsSerialized:
+            self.tools = tools
+            self.toolsSerialized = toolsSerialized
+            logging.debug(f"[tools_reset] Tool schema rebuilt ({len(toolsSerialized)} characters)")
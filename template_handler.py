@@ -0,0 +1,115 @@
+# Message templates are read once, split into literal and keyword segments and rendered in a single pass.
+from io_handler import ioScopes
+from io_handler import ioRead
+
+import logging
+import re
+import os
+
+keywordPattern = re.compile(r"(![A-Z0-9]+)(\n?)")
+
+class compiledTemplate():
+    def __init__(self, text: str, fileID: tuple):
+        self.fileID = fileID # (inode, mtime) of the file the template was compiled from
+        self.segments = []   # literal strings and (keyword, trailing newline) tuples, in order
+
+        position = 0
+        for match in keywordPattern.finditer(text):
+            if match.start() > position:
+                self.segments.append(text[position:match.start()])
+            self.segments.append((match.group(1), match.group(2)))
+            position = match.end()
+
+        if position < len(text):
+            self.segments.append(text[position:])
+
+    def render(self, values: dict, maxUses: int = None) -> str:
+        """
+        Substitute the template's keywords with `values` in a single pass. Substituted text is never scanned for keywords again.
+
+        Args:
+            values (dict): Keywords (including the `!`) mapped to their replacements:
+                - str: Replaces every occurrence of the keyword.
+                - callable: Called once per occurrence, for keywords that need a unique value each time (e.g. random tracks).
+                - None: Removes the keyword along with the newline following it, if any.
+                - Keywords that aren't in `values` are left intact.
+            maxUses (int): How many occurrences of each callable keyword are replaced; later occurrences are left intact.
+
+        Returns:
+            str: The rendered template.
+        """
+        output = []
+        useCounts = {}
+
+        for segment in self.segments:
+            if type(segment) == str:
+                output.append(segment)
+                continue
+
+            keyword, trailingNewline = segment
+            if keyword not in values:
+                output.append(keyword + trailingNewline)
+                continue
+
+            value = values[keyword]
+            if value is None:
+                continue
+
+            if callable(value):
+                useCounts[keyword] = useCounts.get(keyword, 0) + 1
+                if maxUses is not None and useCounts[keyword] > maxUses:
+                    output.append(keyword + trailingNewline)
+                    continue
+                value = value()
+
+            output.append(value + trailingNewline)
+
+        return "".join(output)
+
+
+templateCache = {}
+
+def getTemplate(templateName: str) -> compiledTemplate:
+    """
+    Return the compiled form of a `message_templates` file, compiling it only if it isn't cached or the file has changed since.
+
+    Args:
+        templateName (str): The full file name of the template.
+
+    Returns:
+        compiledTemplate: The compiled template.
+
+    Raises:
+        FileNotFoundError: if the template doesn't exist.
+    """
+    try:
+        fileStat = os.stat(f"{ioScopes.md.value}{templateName}")
+    except FileNotFoundError as e:
+        logging.warning(f"[getTemplate] Template {templateName} not found!")
+        templateCache.pop(templateName, None)
+        raise e
+
+    fileID = (fileStat.st_ino, fileStat.st_mtime_ns)
+    template = templateCache.get(templateName)
+
+    if template is None or template.fileID != fileID:
+        template = compiledTemplate(ioRead(ioScopes.md, templateName), fileID)
+        templateCache[templateName] = template
+        logging.debug(f"[getTemplate] Compiled {templateName} into {len(template.segments)} segments")
+
+    return template
+
+
+def renderTemplate(templateName: str, values: dict = None, maxUses: int = None) -> str:
+    """
+    Render a `message_templates` file. See `compiledTemplate.render` for how `values` and `maxUses` are handled.
+
+    Args:
+        templateName (str): The full file name of the template.
+        values (dict): Keywords (including the `!`) mapped to their replacements.
+        maxUses (int): How many occurrences of each callable keyword are replaced.
+
+    Returns:
+        str: The rendered template.
+    """
+    return getTemplate(templateName).render(values or {}, maxUses)
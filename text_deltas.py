@@ -0,0 +1,136 @@
+# Compact line-based deltas between versions of a databank entry, and the helpers to migrate the old unified diff history to them.
+from difflib import SequenceMatcher
+import json
+import zlib
+import re
+
+def packSnapshot(text: str) -> bytes:
+    """
+    Compress a full version of an entry.
+
+    Args:
+        text (str): The entry's text.
+
+    Returns:
+        bytes: The compressed text.
+    """
+    return zlib.compress(text.encode())
+
+
+def unpackSnapshot(data: bytes) -> str:
+    """
+    Decompress a full version of an entry made by `packSnapshot`.
+
+    Args:
+        data (bytes): The compressed text.
+
+    Returns:
+        str: The entry's text.
+    """
+    return zlib.decompress(data).decode()
+
+
+def makeDelta(oldText: str, newText: str) -> bytes:
+    """
+    Describe `newText` in terms of `oldText`: runs of lines copied from the old text, and the lines that are new. The result is compressed.
+
+    Args:
+        oldText (str): The previous version.
+        newText (str): The new version.
+
+    Returns:
+        bytes: The compressed delta, for `applyDelta`.
+    """
+    oldLines = oldText.split("\n") # not splitlines(), so a trailing newline survives the round trip
+    newLines = newText.split("\n")
+
+    operations = []
+    for tag, oldStart, oldEnd, newStart, newEnd in SequenceMatcher(None, oldLines, newLines, autojunk=False).get_opcodes():
+        if tag == "equal":
+            operations.append([oldStart, oldEnd])  # copy these lines of the old text
+        elif newEnd > newStart:
+            operations.append(newLines[newStart:newEnd])  # insert these lines
+
+    return zlib.compress(json.dumps(operations, ensure_ascii=False, separators=(",", ":")).encode())
+
+
+def applyDelta(oldText: str, delta: bytes) -> str:
+    """
+    Rebuild a version from the version before it and the delta `makeDelta` made between them.
+
+    Args:
+        oldText (str): The previous version.
+        delta (bytes): The compressed delta.
+
+    Returns:
+        str: The new version.
+    """
+    oldLines = oldText.split("\n")
+    newLines = []
+
+    for operation in json.loads(zlib.decompress(delta)):
+        if operation and type(operation[0]) == int:
+            newLines.extend(oldLines[operation[0]:operation[1]])
+        else:
+            newLines.extend(operation)
+
+    return "\n".join(newLines)
+
+
+hunkHeaderPattern = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+def revertUnifiedDiff(newText: str, diff: str) -> str:
+    """
+    Undo an edit recorded as a unified diff (as `editEntry` used to store them), getting back the text from before it.
+    The diffs were made from `splitlines()` output, so line endings aren't preserved; the rebuilt text is joined with `\\n`.
+
+    Args:
+        newText (str): The text after the edit.
+        diff (str): The edit's unified diff, or "[No changes...]".
+
+    Returns:
+        str: The text before the edit.
+
+    Raises:
+        ValueError: if the diff doesn't apply to `newText`.
+    """
+    if diff == "[No changes...]" or not diff.strip():
+        return newText
+
+    newLines = newText.splitlines()
+    oldLines = []
+    newPosition = 0 # index into newLines of the first line not yet copied over
+    hunkLines = diff.split("\n")
+    lineIndex = 0
+
+    while lineIndex < len(hunkLines):
+        header = hunkHeaderPattern.match(hunkLines[lineIndex])
+        lineIndex += 1
+        if not header:
+            continue # the ---/+++ file headers
+
+        newStart = int(header.group(3))
+        newCount = int(header.group(4)) if header.group(4) is not None else 1
+        hunkNewStart = newStart - 1 if newCount else newStart # an empty side's start points at the line before it
+
+        oldLines.extend(newLines[newPosition:hunkNewStart])
+        newPosition = hunkNewStart
+
+        while lineIndex < len(hunkLines) and not hunkHeaderPattern.match(hunkLines[lineIndex]):
+            hunkLine = hunkLines[lineIndex]
+            lineIndex += 1
+            marker, content = hunkLine[:1], hunkLine[1:]
+
+            if marker == "-":
+                oldLines.append(content)
+                continue
+            if marker not in (" ", "+"):
+                continue
+            if newPosition >= len(newLines) or newLines[newPosition] != content:
+                raise ValueError(f"diff doesn't apply at line {newPosition + 1}")
+            if marker == " ":
+                oldLines.append(content)
+            newPosition += 1
+
+    oldLines.extend(newLines[newPosition:])
+    return "\n".join(oldLines)
@@ -0,0 +1,120 @@
+# Cheap, dependency-free text vectors for finding the databank passages that are relevant to a question.
+# Words and word pairs are hashed into a fixed number of dimensions (the "hashing trick"), so there's no vocabulary to train or store.
+from array import array
+import heapq
+import math
+import zlib
+import re
+
+vectorDimensions = 512
+chunkSize = 600 # characters; about a paragraph, which is roughly what a question needs from an entry
+
+# words that show up everywhere and say nothing about what a passage is about; left in, they'd drown out the words that do
+stopWords = frozenset((
+    "a", "about", "an", "and", "are", "as", "at", "be", "but", "by", "can", "did", "do", "does", "for", "from", "had", "has", "have",
+    "how", "i", "in", "is", "it", "its", "me", "my", "of", "on", "or", "so", "tell", "that", "the", "their", "them", "there", "they",
+    "this", "to", "was", "we", "were", "what", "when", "where", "which", "who", "why", "will", "with", "you", "your"
+))
+
+def chunkText(text: str) -> list[str]:
+    """
+    Split an entry's text into passages of up to `chunkSize` characters, breaking between paragraphs where possible, then between sentences.
+
+    Args:
+        text (str): The entry's text.
+
+    Returns:
+        list[str]: The passages, in order.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        if len(paragraph) <= chunkSize:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            pieces.extend(sentence[start:start + chunkSize] for start in range(0, len(sentence), chunkSize))
+
+    chunks = []
+    currentChunk = ""
+    for piece in pieces:
+        if currentChunk and len(currentChunk) + 1 + len(piece) > chunkSize:
+            chunks.append(currentChunk)
+            currentChunk = piece
+        else:
+            currentChunk = f"{currentChunk}\n{piece}" if currentChunk else piece
+
+    if currentChunk.strip():
+        chunks.append(currentChunk)
+    return chunks
+
+
+def vectorizeText(text: str) -> array:
+    """
+    Turn text into an L2-normalized vector of `vectorDimensions` floats, so the dot product of two vectors is their cosine similarity.
+    Words (other than `stopWords`) and adjacent word pairs are hashed with CRC32 (stable across restarts, unlike `hash()`); repeated features are dampened logarithmically.
+
+    Args:
+        text (str): The text to vectorize.
+
+    Returns:
+        array: The vector, as an `array("f")`. All zeros if the text has no words.
+    """
+    words = [word for word in re.findall(r"\w+", text.lower()) if word not in stopWords]
+    features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    featureCounts = {}
+    for feature in features:
+        featureHash = zlib.crc32(feature.encode())
+        index = featureHash % vectorDimensions
+        sign = 1 if featureHash & 0x80000000 else -1 # a second, independent bit keeps collisions from only ever adding up
+        featureCounts[(index, sign)] = featureCounts.get((index, sign), 0) + 1
+
+    vector = array("f", bytes(4 * vectorDimensions))
+    for (index, sign), count in featureCounts.items():
+        vector[index] += sign * (1 + math.log(count))
+
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm:
+        for index in range(vectorDimensions):
+            vector[index] /= norm
+    return vector
+
+
+def vectorizeChunks(text: str) -> list[tuple[str, bytes]]:
+    """
+    Split an entry into passages and vectorize each of them, ready to be stored in `entry_chunks`.
+
+    Args:
+        text (str): The entry's text.
+
+    Returns:
+        list[tuple[str, bytes]]: (passage, raw vector bytes) pairs, in order.
+    """
+    return [(chunk, vectorizeText(chunk).tobytes()) for chunk in chunkText(text)]
+
+
+def topChunks(queryVector: array, chunkVectors: list, limit: int) -> list[tuple[float, int]]:
+    """
+    Score every chunk against a query and return the best ones.
+    A query only has a handful of non-zero dimensions, so only those are multiplied out. This is plain Python rather than numpy,
+    since the bot doesn't depend on it; it takes a few milliseconds for a few thousand passages, which is fine next to an LLM call.
+
+    Args:
+        queryVector (array): The query's vector, from `vectorizeText`.
+        chunkVectors (list): The chunks' vectors, from `vectorizeText`.
+        limit (int): The maximum number of results.
+
+    Returns:
+        list[tuple[float, int]]: (score, index into `chunkVectors`) pairs with a positive score, best first.
+    """
+    queryTerms = [(index, value) for index, value in enumerate(queryVector) if value]
+    if not queryTerms:
+        return []
+
+    scores = []
+    for chunkIndex, chunkVector in enumerate(chunkVectors):
+        score = sum(value * chunkVector[index] for index, value in queryTerms)
+        if score > 0:
+            scores.append((score, chunkIndex))
+
+    return heapq.nlargest(limit, scores)
@@ -9,12 +9,15 @@ from states import firmStateSet
 from io_handler import ioScopes
 from io_handler import ioRead
 
+from net_handler import fetchEndpoint
+
 from lookup_tables import *
 
+from dataclasses import dataclass, field
 import xml.etree.ElementTree as ET
 from datetime import datetime
-import requests
 import hashlib
+import io
 import logging
 import re
 
@@ -195,128 +198,151 @@ def convertPlayerList(playerList, game):
 
     return playerListPrintable
 
-def fetchLobbyList():
-
-    xmlData = requests.get(firmStates.urlListing)
-    # try:
-    #     with open("../GetLobbyListing.xml", "r") as exampleXMLFile:
-    #         xmlOfflineData = exampleXMLFile.read()
-    # except:
-    #     logging.debug("[fetchLobbyList] Couldn't open the example XML, to be expected on production")
-    parsingResultsHD = ""
-    parsingResultsPulse = ""
-    raceProgress = ""
-
-    try:
-        xmlHash = hashlib.sha1(xmlData.content).hexdigest() # calculate hash to not do same work more than once
-    except Exception as e:
-        logging.warning(f"[fetchLobbyList] Failed to calculate xmlHash with `{e}`, malformed XML?")
-        xmlHash = "None"
-
-    try:
-        #root = ET.fromstring(xmlOfflineData)
-        root = ET.fromstring(xmlData.content)
-    except ET.ParseError:
-        logging.warning("[Lobby XML Parser] Bad XML passed")
-        volatileStates.hashAPILobby = xmlHash
-        return "failureApiFault"
-
-    if xmlHash == volatileStates.hashAPILobby:
-        logging.debug("[fetchLobbyList] New XML hash is the same as stored! Aborting...")
-        return "nothingToDo"
-    else: 
-        volatileStates.hashAPILobby = xmlHash
-        logging.debug("[fetchLobbyList] New XML hash is unique! It's stored in volatileStates now.")
-
-    if root.findall('Lobby') == []: # terminate task if no lobbies are in the list (arrays will crash the program otherwise)
-        logging.debug("[Lobby XML Parser] XML passed is empty")
-        return "No lobbies are up."
-
-    # tournament progression listing bugfix
-    # okay basically listing breaks if the tournament ends prematurely because the function can't account for that so the variables aren't reset
-    # so the next tournament race counter is off by some number and you can't fix it and it'll stay like that forever
-    # which is why we watch to make sure that if the tournament function isn't invoked, the dict is nuked, so that leftover variables (if any) aren't
-    # passed down
-    # this could be done per-lobby as well but that would be way more complicated than this single bool and i honestly cannot be bothered to do that
-    # for the specific case of someone holding two tournaments then one of them ending prematurely then that person restarting the tournament and wondering
-    # why it's broken
-
-    volatileStates.tourneyProgressFunctionIsIdle = True
-
-    for lobby in root.findall('Lobby'): # let's get xml'ing!!!! this loop will parse each lobby, put its properties into variables and compose it into a text block
-        volatileStates.appId = lobby.attrib["AppId"] # the appId determines what game the parsing will be done for
-            
-        match volatileStates.appId:
-            case "23360": # this appId is for WipEout HD
-
-
-                # ---###--- WIPEOUT HD PARSING START ---###---
-
-
-                propertyTournamentTrackListIDs = []
-                propertyWeaponList = []
-
-                propertyGameName = lobby.attrib["GameName"]
-                propertyTrack = convertGameLevelToName(lobby.attrib["GameLevel"])
-                propertyGameMode = convertRulesetToMode(lobby.attrib["RuleSet"])
-                propertySpeedClass, propertyDefaultLapCount = convertPlayerSkillToClass(lobby.attrib["PlayerSkillLevel"])
-                propertyPlayerList = lobby.attrib["PlayerListCurrent"]
-                propertyWeaponsEnabled = lobby.attrib["GenericField1"]
-                propertyPlayerCount = lobby.attrib["PlayerCount"]
-                propertyCreateDate = lobby.attrib["GameCreateDt"]
-                propertyMiscSettings = ""
-
-                dtObject = datetime.fromisoformat(propertyCreateDate.replace("Z", "+00:00"))
-                propertyCreateDate = int(dtObject.timestamp())
-
-                for stats in lobby.findall('GameStats'):
-                    for config in stats:
-                        if config.tag == "HostName": propertyLobbyName = config.text 
-                        if config.tag == "LapCount": propertyLapCount = config.text 
-                        if config.tag == "ElimTarget": propertyElimTarget = config.text 
-                        if config.tag == "ZBTarget": propertyZBTarget = config.text 
-                        if config.tag == "RaceProgress": propertyRaceProgress = config.text 
-
-                    for miscStats in stats.findall("LobbyConfigSecondary"):
-                        for miscConfig in miscStats:
-                            if miscConfig.tag == "WeaponHints" and miscConfig.text == "0" and propertyWeaponsEnabled == "1": propertyMiscSettings = f"{propertyMiscSettings} // Hints Off"
-                            if miscConfig.tag == "BRsAllowed" and miscConfig.text == "0": propertyMiscSettings = f"{propertyMiscSettings} // BRs Off" 
-                            if miscConfig.tag == "PilotAssistAllowed" and miscConfig.text == "0" and propertyGameMode != "Zone Battle": propertyMiscSettings = f"{propertyMiscSettings} // PA Off"
-                    
-                    for weaponsPrimary in stats.findall("WeaponsConfigPrimary"):
-                        for weapon in weaponsPrimary:
-                            propertyWeaponList.append(weapon.text)
-
-                    for weaponsSecondary in stats.findall("WeaponsConfigSecondary"):
-                        for weapon in weaponsSecondary:
-                            propertyWeaponList.append(weapon.text)
-
-                    for trackList in stats.findall("TrackList"):
-                        for track in trackList:
-                            propertyTournamentTrackListIDs.append(track.text)
-                            propertyTourneyTrackCount = trackList.attrib["totalEntries"]
-
-                # this approach to paring the xml may not be the most optimal but it's much more readable than what we had before and
-                # it's also good enough performance-wise
-
-                playerListPrintable = convertPlayerList(propertyPlayerList, "hd")
-
-                if propertyDefaultLapCount == propertyLapCount:
-                    listingLapCount = ""
-                else:
-                    listingLapCount = f" ({propertyLapCount} Laps)"
+@dataclass(slots=True)
+class lobbyRecord: # everything the lobby assemblers need to know about a single <Lobby>, flattened by iterLobbyRecords
+    appId: str
+    attributes: dict
+    stats: dict = field(default_factory=dict)               # direct GameStats children, tag -> text
+    secondaryConfig: list = field(default_factory=list)     # LobbyConfigSecondary children as (tag, text), in document order
+    weapons: list = field(default_factory=list)             # WeaponsConfigPrimary entries followed by WeaponsConfigSecondary entries
+    trackList: list = field(default_factory=list)           # TrackList entries (track IDs for HD, bitmasks for Pulse)
+    trackCount: str = None                                  # TrackList's totalEntries, only set if the list has entries
+
+    def tracksTourneyProgress(self) -> bool:
+        return self.appId == "23360" and convertRulesetToMode(self.attributes.get("RuleSet")) == "Tournament"
+
+    def fingerprint(self) -> tuple:
+        """
+        Return a key that changes whenever anything the lobby's block is assembled from changes.
+        HD tournament blocks also depend on the lobby's `tourneyProgressByLobby` entry, so it is a part of their key.
+        """
+        fingerprint = (self.appId, tuple(self.attributes.items()), tuple(self.stats.items()), tuple(self.secondaryConfig),
+                       tuple(self.weapons), tuple(self.trackList), self.trackCount)
+
+        if self.tracksTourneyProgress():
+            fingerprint += (volatileStates.tourneyProgressByLobby.get(self.attributes.get("GameName")),)
+
+        return fingerprint
+
+def iterLobbyRecords(xmlContent: bytes):
+    """
+    Parse a lobby listing in a single streaming pass, yielding one `lobbyRecord` per top-level <Lobby>.
+    Every lobby is dropped from the tree as soon as its record is yielded, so memory use doesn't grow with the lobby count.
+
+    Args:
+        xmlContent (bytes): The listing as received from the API.
+
+    Yields:
+        lobbyRecord: The next lobby in the listing.
+
+    Raises:
+        ET.ParseError: if the XML is malformed. Since parsing is lazy, this may happen after some records were yielded.
+    """
+    root = None
+    lobby = lobbyRecord(appId=None, attributes={})
+
+    # start events are only needed to get a hold of the root; everything else is read on end events,
+    # since by the time a container ends its children are complete and can be read once, in place
+    for event, element in ET.iterparse(io.BytesIO(xmlContent), events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+
+        match element.tag:
+            case "LobbyConfigSecondary":
+                lobby.secondaryConfig.extend((miscConfig.tag, miscConfig.text) for miscConfig in element)
+            case "WeaponsConfigPrimary" | "WeaponsConfigSecondary":
+                lobby.weapons.extend(weapon.text for weapon in element)
+            case "TrackList":
+                lobby.trackList.extend(track.text for track in element)
+                if lobby.trackList:
+                    lobby.trackCount = element.attrib.get("totalEntries")
+            case "GameStats":
+                lobby.stats.update((config.tag, config.text) for config in element)
+            case "Lobby":
+                lobby.appId = element.attrib.get("AppId")
+                lobby.attributes = dict(element.attrib)
+                yield lobby
+                lobby = lobbyRecord(appId=None, attributes={})
+                root.clear() # the lobby is fully digested, nothing in the tree is needed anymore
+
+def assembleLobbyBlockCached(lobby: lobbyRecord, assembleLobbyBlock, renderedLobbies: dict) -> str:
+    """
+    Return the block of `lobby`, reusing the one rendered on a previous poll if none of its data changed.
+    Every block used is put into `renderedLobbies`, which replaces `volatileStates.lobbyBlockCache` once the listing is done,
+    so lobbies that are gone are evicted.
+
+    Args:
+        lobby (lobbyRecord): The lobby to render.
+        assembleLobbyBlock (function): The assembler to use if the block isn't cached (assembleHDLobbyBlock or assemblePulseLobbyBlock).
+        renderedLobbies (dict): The cache being built during the current poll.
+
+    Returns:
+        str: The lobby block.
+    """
+    fingerprint = lobby.fingerprint()
+    lobbyBlock = volatileStates.lobbyBlockCache.get(fingerprint)
+
+    if lobbyBlock is None:
+        lobbyBlock = assembleLobbyBlock(lobby)
+    elif lobby.tracksTourneyProgress(): # a cached tournament still counts as one in progress (see fetchLobbyList for why that matters)
+        volatileStates.tourneyProgressFunctionIsIdle = False
+
+    renderedLobbies[fingerprint] = lobbyBlock
+    return lobbyBlock
+
+def assembleHDLobbyBlock(lobby: lobbyRecord) -> str:
+
+    # ---###--- WIPEOUT HD PARSING START ---###---
+
+
+    propertyGameName = lobby.attributes["GameName"]
+    propertyTrack = convertGameLevelToName(lobby.attributes["GameLevel"])
+    propertyGameMode = convertRulesetToMode(lobby.attributes["RuleSet"])
+    propertySpeedClass, propertyDefaultLapCount = convertPlayerSkillToClass(lobby.attributes["PlayerSkillLevel"])
+    propertyPlayerList = lobby.attributes["PlayerListCurrent"]
+    propertyWeaponsEnabled = lobby.attributes["GenericField1"]
+    propertyPlayerCount = lobby.attributes["PlayerCount"]
+    propertyCreateDate = lobby.attributes["GameCreateDt"]
+    propertyMiscSettings = ""
+
+    dtObject = datetime.fromisoformat(propertyCreateDate.replace("Z", "+00:00"))
+    propertyCreateDate = int(dtObject.timestamp())
+
+    propertyLobbyName = lobby.stats["HostName"]
+    propertyLapCount = lobby.stats["LapCount"]
+    propertyElimTarget = lobby.stats["ElimTarget"]
+    propertyZBTarget = lobby.stats["ZBTarget"]
+    propertyRaceProgress = lobby.stats["RaceProgress"]
+
+    for miscTag, miscValue in lobby.secondaryConfig:
+        if miscTag == "WeaponHints" and miscValue == "0" and propertyWeaponsEnabled == "1": propertyMiscSettings = f"{propertyMiscSettings} // Hints Off"
+        if miscTag == "BRsAllowed" and miscValue == "0": propertyMiscSettings = f"{propertyMiscSettings} // BRs Off" 
+        if miscTag == "PilotAssistAllowed" and miscValue == "0" and propertyGameMode != "Zone Battle": propertyMiscSettings = f"{propertyMiscSettings} // PA Off"
+
+    propertyWeaponList = list(lobby.weapons) # parseWeaponArray pops from the list, the record must stay intact
+    propertyTournamentTrackListIDs = lobby.trackList
+    propertyTourneyTrackCount = lobby.trackCount
+
+    playerListPrintable = convertPlayerList(propertyPlayerList, "hd")
+
+    if propertyDefaultLapCount == propertyLapCount:
+        listingLapCount = ""
+    else:
+        listingLapCount = f" ({propertyLapCount} Laps)"
 
 
-                # ---###--- ASSEMBLE HD LOBBY BLOCK ---###---
+    # ---###--- ASSEMBLE HD LOBBY BLOCK ---###---
 
 
-                match propertyGameMode:
-                    case "Single Race":
-                        weaponAddendum = parseWeaponArray(propertyWeaponList, "Single Race") if propertyWeaponsEnabled == "1" else "Weapons disabled"
-                        includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
-                        progressAddendum = calculateGameProgress(propertyRaceProgress, propertyLapCount, includeVitaWarning)
+    match propertyGameMode:
+        case "Single Race":
+            weaponAddendum = parseWeaponArray(propertyWeaponList, "Single Race") if propertyWeaponsEnabled == "1" else "Weapons disabled"
+            includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
+            progressAddendum = calculateGameProgress(propertyRaceProgress, propertyLapCount, includeVitaWarning)
 
-                        hdLobbyBlock = f"**   \
+            hdLobbyBlock = f"**   \
 {propertyLobbyName} ({propertyPlayerCount}/8) // \
 {propertyTrack} // \
 {propertySpeedClass} {propertyGameMode}{listingLapCount}\
@@ -325,12 +351,12 @@ def fetchLobbyList():
 {playerListPrintable}\
 {progressAddendum}"
 
-                    case "Eliminator":
-                        weaponAddendum = parseWeaponArray(propertyWeaponList, "Eliminator")
-                        includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
-                        progressAddendum = calculateGameProgress(propertyRaceProgress, propertyElimTarget, includeVitaWarning)
+        case "Eliminator":
+            weaponAddendum = parseWeaponArray(propertyWeaponList, "Eliminator")
+            includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
+            progressAddendum = calculateGameProgress(propertyRaceProgress, propertyElimTarget, includeVitaWarning)
 
-                        hdLobbyBlock = f"**   \
+            hdLobbyBlock = f"**   \
 {propertyLobbyName} ({propertyPlayerCount}/8) // \
 {propertyTrack} // \
 {propertySpeedClass} {propertyGameMode} ({propertyElimTarget})\
@@ -339,11 +365,11 @@ def fetchLobbyList():
 {playerListPrintable}\
 {progressAddendum}"
 
-                    case "Zone Battle":
-                        includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
-                        progressAddendum = calculateGameProgress(propertyRaceProgress, propertyZBTarget, includeVitaWarning)
+        case "Zone Battle":
+            includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
+            progressAddendum = calculateGameProgress(propertyRaceProgress, propertyZBTarget, includeVitaWarning)
 
-                        hdLobbyBlock = f"**   \
+            hdLobbyBlock = f"**   \
 {propertyLobbyName} ({propertyPlayerCount}/8) // \
 {propertyTrack} // \
 {propertyGameMode} ({propertyZBTarget})\
@@ -352,14 +378,14 @@ def fetchLobbyList():
 {playerListPrintable}\
 {progressAddendum}"
 
-                    case "Tournament":
-                        weaponAddendum = parseWeaponArray(propertyWeaponList, "Single Race") if propertyWeaponsEnabled == "1" else "Weapons disabled"
-                        includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
-                        progressAddendum, currentRaceNumber = calculateTourneyProgress(propertyRaceProgress, propertyLapCount, \
-                        propertyTourneyTrackCount, propertyGameName, includeVitaWarning)
-                        trackList = convertTourneyTrackList(propertyTournamentTrackListIDs, "HD", currentRaceNumber)
+        case "Tournament":
+            weaponAddendum = parseWeaponArray(propertyWeaponList, "Single Race") if propertyWeaponsEnabled == "1" else "Weapons disabled"
+            includeVitaWarning = True if firmStates.showVitaWarning == True and "+Vita" in propertyPlayerList else False
+            progressAddendum, currentRaceNumber = calculateTourneyProgress(propertyRaceProgress, propertyLapCount, \
+            propertyTourneyTrackCount, propertyGameName, includeVitaWarning)
+            trackList = convertTourneyTrackList(propertyTournamentTrackListIDs, "HD", currentRaceNumber)
 
-                        hdLobbyBlock = f"**   \
+            hdLobbyBlock = f"**   \
 {propertyLobbyName} ({propertyPlayerCount}/8) // \
 {propertyTourneyTrackCount} Race {propertySpeedClass} {propertyGameMode}{listingLapCount}\
 {propertyMiscSettings}**\
@@ -368,49 +394,40 @@ def fetchLobbyList():
 {playerListPrintable}\
 {progressAddendum}"
 
-                    case _:
-                        hdLobbyBlock = "\n! Parsing error.\n"
-                        logging.warning("[fetchLobbyList] Error while parsing HD XML!")
-            
-                parsingResultsHD = f"{parsingResultsHD}\n{hdLobbyBlock}\n"
-
-                # ---###--- HD LOBBY DONE ---###---
-
+        case _:
+            hdLobbyBlock = "\n! Parsing error.\n"
+            logging.warning("[fetchLobbyList] Error while parsing HD XML!")
 
-            case "20794": # parse pulse lobbies
+    # ---###--- HD LOBBY DONE ---###---
 
+    return hdLobbyBlock
 
-                # ---###--- WIPEOUT PULSE PARSING START ---###---
+def assemblePulseLobbyBlock(lobby: lobbyRecord) -> str:
 
+    # ---###--- WIPEOUT PULSE PARSING START ---###---
 
-                propertyTournamentTrackListIDs = []
 
-                propertyTrack = convertPulseGameLevelToName(lobby.attrib["GameLevel"])
-                propertyGameMode = convertPulseRulesetToMode(lobby.attrib["RuleSet"])
-                propertySpeedClass, propertyDefaultLapCount = convertPlayerSkillToClass(lobby.attrib["PlayerSkillLevel"])
-                propertyPlayerList = lobby.attrib["PlayerListCurrent"]
-                propertyLobbyName = lobby.attrib["GameName"]
-                propertyPlayerCount = lobby.attrib["PlayerCount"]
-                propertyMaximumPlayerCount = lobby.attrib["MaxPlayers"]
+    propertyTrack = convertPulseGameLevelToName(lobby.attributes["GameLevel"])
+    propertyGameMode = convertPulseRulesetToMode(lobby.attributes["RuleSet"])
+    propertySpeedClass, propertyDefaultLapCount = convertPlayerSkillToClass(lobby.attributes["PlayerSkillLevel"])
+    propertyPlayerList = lobby.attributes["PlayerListCurrent"]
+    propertyLobbyName = lobby.attributes["GameName"]
+    propertyPlayerCount = lobby.attributes["PlayerCount"]
+    propertyMaximumPlayerCount = lobby.attributes["MaxPlayers"]
 
-                for stats in lobby.findall('GameStats'):
-                    for config in stats:
-                        if(config.tag == "Weapons"):
-                            propertyWeaponsEnabled = "// Weapons off" if config.text == "0" else ""
-                        if(config.tag == "TrackList"):
-                            for bitmask in config:
-                                propertyTournamentTrackListIDs.append(bitmask.text)
-                        if(config.tag == "RaceInProgress"):
-                            propertyRaceInProgress = "\n**   >> RACE IN PROGRESS... HOLD ON! <<**\n-# ‎   When a Pulse race is ongoing, the lobby is hidden in-game. Please be patient!" if config.text == "1" else ""
+    propertyWeaponsEnabled = "// Weapons off" if lobby.stats["Weapons"] == "0" else ""
+    propertyTournamentTrackListIDs = lobby.trackList
+    propertyRaceInProgress = "\n**   >> RACE IN PROGRESS... HOLD ON! <<**\n-# ‎   When a Pulse race is ongoing, the lobby is hidden in-game. Please be patient!" \
+    if lobby.stats["RaceInProgress"] == "1" else ""
 
-                # ---###--- ASSEMBLE PULSE LOBBY BLOCK ---###---
+    # ---###--- ASSEMBLE PULSE LOBBY BLOCK ---###---
 
 
-                playerListPrintable = convertPlayerList(propertyPlayerList, "pulse")
+    playerListPrintable = convertPlayerList(propertyPlayerList, "pulse")
 
-                match propertyGameMode:
-                    case "Single Race" | "Head to Head" | "Eliminator":
-                        pulseLobbyBlock = f"\
+    match propertyGameMode:
+        case "Single Race" | "Head to Head" | "Eliminator":
+            pulseLobbyBlock = f"\
 **   {propertyLobbyName} ({propertyPlayerCount}/{propertyMaximumPlayerCount}) \
 // {propertyTrack} \
 // {propertySpeedClass} {propertyGameMode} \
@@ -418,9 +435,9 @@ def fetchLobbyList():
 {playerListPrintable}\
 {propertyRaceInProgress}"
 
-                    case "Tournament":
-                        trackList = convertTourneyTrackList(propertyTournamentTrackListIDs, "Pulse")
-                        pulseLobbyBlock = f"\
+        case "Tournament":
+            trackList = convertTourneyTrackList(propertyTournamentTrackListIDs, "Pulse")
+            pulseLobbyBlock = f"\
 **   {propertyLobbyName} ({propertyPlayerCount}/{propertyMaximumPlayerCount}) \
 // {propertySpeedClass} {propertyGameMode} \
 {propertyWeaponsEnabled}**\
@@ -428,18 +445,80 @@ def fetchLobbyList():
 {playerListPrintable}\
 {propertyRaceInProgress}"
 
-                    case _:
-                        pulseLobbyBlock = "\n! Parsing error.\n"
-                        logging.warning("[fetchLobbyList] Error while parsing Pulse XML!")
+        case _:
+            pulseLobbyBlock = "\n! Parsing error.\n"
+            logging.warning("[fetchLobbyList] Error while parsing Pulse XML!")
+
+    # ---###--- PULSE LOBBY DONE ---###---
+
+    return pulseLobbyBlock
 
-                parsingResultsPulse = f"{parsingResultsPulse}\n{pulseLobbyBlock}\n"
+async def fetchLobbyList():
 
+    # a reset hash means that the listing has to be rebuilt from scratch, so a 304 is only acceptable if we have one
+    fetchStatus, xmlContent = await fetchEndpoint(firmStates.urlListing, conditional=volatileStates.hashAPILobby != "None")
 
-                # ---###--- PULSE LOBBY DONE ---###---
+    if fetchStatus == "notModified":
+        logging.debug("[fetchLobbyList] Server says the listing is unchanged! Aborting...")
+        return "nothingToDo"
+    elif fetchStatus == "failure":
+        logging.warning("[fetchLobbyList] No data received from the API")
+        return "failureApiFault"
+
+    # try:
+    #     with open("../GetLobbyListing.xml", "rb") as exampleXMLFile:
+    #         xmlContent = exampleXMLFile.read()
+    # except:
+    #     logging.debug("[fetchLobbyList] Couldn't open the example XML, to be expected on production")
+    parsingResultsHD = ""
+    parsingResultsPulse = ""
+    renderedLobbies = {}
+    lobbyCount = 0
 
+    xmlHash = hashlib.blake2b(xmlContent, digest_size=16).hexdigest() # calculate hash to not do same work more than once
 
-            case _:
-                logging.debug("Unknown AppId on listing, ignoring...")
+    if xmlHash == volatileStates.hashAPILobby: # checked before parsing, so an unchanged listing only costs the digest
+        logging.debug("[fetchLobbyList] New XML hash is the same as stored! Aborting...")
+        return "nothingToDo"
+
+    # tournament progression listing bugfix
+    # okay basically listing breaks if the tournament ends prematurely because the function can't account for that so the variables aren't reset
+    # so the next tournament race counter is off by some number and you can't fix it and it'll stay like that forever
+    # which is why we watch to make sure that if the tournament function isn't invoked, the dict is nuked, so that leftover variables (if any) aren't
+    # passed down
+    # this could be done per-lobby as well but that would be way more complicated than this single bool and i honestly cannot be bothered to do that
+    # for the specific case of someone holding two tournaments then one of them ending prematurely then that person restarting the tournament and wondering
+    # why it's broken
+
+    volatileStates.tourneyProgressFunctionIsIdle = True
+
+    try:
+        for lobby in iterLobbyRecords(xmlContent): # let's get xml'ing!!!! each lobby is parsed in one go and composed into a text block
+            lobbyCount += 1
+            volatileStates.appId = lobby.appId # the appId determines what game the parsing will be done for
+
+            match volatileStates.appId:
+                case "23360": # this appId is for WipEout HD
+                    parsingResultsHD = f"{parsingResultsHD}\n{assembleLobbyBlockCached(lobby, assembleHDLobbyBlock, renderedLobbies)}\n"
+
+                case "20794": # parse pulse lobbies
+                    parsingResultsPulse = f"{parsingResultsPulse}\n{assembleLobbyBlockCached(lobby, assemblePulseLobbyBlock, renderedLobbies)}\n"
+
+                case _:
+                    logging.debug("Unknown AppId on listing, ignoring...")
+
+    except ET.ParseError:
+        logging.warning("[Lobby XML Parser] Bad XML passed")
+        volatileStates.hashAPILobby = "None" # bad XML is never stored as known, so it's parsed (and reported) again on the next poll
+        return "failureApiFault"
+
+    volatileStates.hashAPILobby = xmlHash
+    volatileStates.lobbyBlockCache = renderedLobbies # lobbies that are gone don't make it to the new cache
+    logging.debug("[fetchLobbyList] New XML hash is unique! It's stored in volatileStates now.")
+
+    if lobbyCount == 0: # nothing to compose if no lobbies are in the list
+        logging.debug("[Lobby XML Parser] XML passed is empty")
+        return "No lobbies are up."
 
 
     # ---###--- PARSING IS DONE, COMPOSING INTO FINAL OUTPUT ---###---
@@ -457,24 +536,30 @@ def fetchLobbyList():
     else:
         return(f"\nLobby listing (HD):{parsingResultsHD}\nLobby listing (Pulse):{parsingResultsPulse}")
 
-def fetchPlayerCount():
-    xmlData = requests.get(firmStates.urlCount)
-    isSameFlag = False
+async def fetchPlayerCount():
+    fetchStatus, xmlContent = await fetchEndpoint(firmStates.urlCount, conditional=volatileStates.hashAPIPlayers != "None")
+
+    if fetchStatus == "notModified":
+        return volatileStates.playerCount, True
+    elif fetchStatus == "failure":
+        logging.warning("[fetchPlayerCount] No data received from the API")
+        return "failureApiFault", None
+
+    xmlHash = hashlib.blake2b(xmlContent, digest_size=16).hexdigest()
+    if xmlHash == volatileStates.hashAPIPlayers:
+        return volatileStates.playerCount, True
 
     try:
-        root = ET.fromstring(xmlData.content)
+        root = ET.fromstring(xmlContent)
     except ET.ParseError:
         logging.warning("[Player Count XML Parser] Bad XML passed")
         return "failureApiFault", None
-    
+
     playerCount = root.attrib["totalEntries"]
+    volatileStates.hashAPIPlayers = xmlHash
 
-    xmlHash = hashlib.sha1(xmlData.content).hexdigest()
-    if xmlHash == volatileStates.hashAPIPlayers:
-        isSameFlag = True
-    else: 
-        volatileStates.hashAPIPlayers = xmlHash
+    volatileStates.playerCount = "1 player is currently logged in." if playerCount == "1" \
+    else "!NOPLAYERS" if playerCount == "0" \
+    else f"{playerCount} players are currently logged in."
 
-    return ("1 player is currently logged in.", isSameFlag) if playerCount == "1" \
-    else ("!NOPLAYERS", isSameFlag) if playerCount == "0"\
-    else (f"{playerCount} players are currently logged in.", isSameFlag)
\ No newline at end of file
+    return volatileStates.playerCount, False
\ No newline at end of file